@@ -0,0 +1,155 @@
+""" Test signals for the offline benchmarks: synthetic guitar-like tones and WAV recordings. """
+
+import re
+from pathlib import Path
+
+import numpy as np
+
+from tuner_utils.audio_source import WavFileSource
+
+SAMPLING_RATE = 44100
+NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+FLAT_NAMES = {'Db': 'C#', 'Eb': 'D#', 'Gb': 'F#', 'Ab': 'G#', 'Bb': 'A#'}
+
+# open strings plus a few fretted notes up to the 12th fret of the high E string
+DEFAULT_MIDI_NOTES = [40, 45, 50, 55, 59, 64, 69, 76]
+
+
+class Clip(object):
+    """ A mono signal (float samples in [-1, 1]) with the note it contains.
+        onset is the sample index where the note starts; everything before it is silence/noise. """
+
+    def __init__(self, name, samples, expected_midi, onset, sampling_rate=SAMPLING_RATE):
+        self.name = name
+        self.samples = samples
+        self.expected_midi = expected_midi
+        self.onset = onset
+        self.sampling_rate = sampling_rate
+
+    @property
+    def expected_frequency(self):
+        return midi_to_frequency(self.expected_midi)
+
+    def frames(self, frame_size):
+        """ yields consecutive frames of frame_size samples (the last partial frame is dropped) """
+
+        for start in range(0, len(self.samples) - frame_size + 1, frame_size):
+            yield self.samples[start:start + frame_size]
+
+
+def midi_to_frequency(midi, a4_freq=440.0):
+    return a4_freq * 2.0 ** ((midi - 69) / 12.0)
+
+
+def midi_to_name(midi):
+    midi = int(round(midi))
+    return f"{NOTE_NAMES[midi % 12]}{midi // 12 - 1}"
+
+
+def name_to_midi(name):
+    """ parses 'E2', 'A#3', 'Bb3' or a plain MIDI number like '45' """
+
+    name = name.strip()
+    if name.isdigit():
+        return int(name)
+    match = re.fullmatch(r"([A-Ga-g])([#b]?)(-?\d)", name)
+    if match is None:
+        raise ValueError(f"Unrecognised note name: {name}")
+    note = match.group(1).upper() + match.group(2)
+    note = FLAT_NAMES.get(note, note)
+    return NOTE_NAMES.index(note) + 12 * (int(match.group(3)) + 1)
+
+
+def guitar_tone(frequency, duration, sampling_rate=SAMPLING_RATE, harmonics=8, inharmonicity=1e-4,
+                decay=1.5, amplitude=0.5):
+    """ plucked-string approximation: 1/h harmonic amplitudes, slightly stretched partials and an
+        exponential decay that is faster for the upper harmonics """
+
+    t = np.arange(int(duration * sampling_rate)) / sampling_rate
+    tone = np.zeros_like(t)
+    for h in range(1, harmonics + 1):
+        partial = h * frequency * np.sqrt(1 + inharmonicity * h * h)
+        if partial >= sampling_rate / 2:
+            break
+        tone += np.sin(2 * np.pi * partial * t) * np.exp(-decay * h * t) / h
+    return tone / np.max(np.abs(tone)) * amplitude
+
+
+def synthetic_clip(midi, pre_roll=0.5, duration=2.0, noise_db=-60.0, sampling_rate=SAMPLING_RATE, seed=0):
+    """ pre_roll seconds of noise followed by a guitar-like tone, with noise_db dBFS white noise throughout """
+
+    onset = int(pre_roll * sampling_rate)
+    tone = guitar_tone(midi_to_frequency(midi), duration, sampling_rate)
+    samples = np.concatenate([np.zeros(onset), tone])
+    if noise_db is not None:
+        rng = np.random.default_rng(seed + midi)
+        samples += rng.standard_normal(len(samples)) * 10 ** (noise_db / 20.0)
+    return Clip(f"synthetic {midi_to_name(midi)}", np.clip(samples, -1.0, 1.0), midi, onset, sampling_rate)
+
+
+def synthetic_corpus(midi_notes=None, **kwargs):
+    return [synthetic_clip(midi, **kwargs) for midi in (midi_notes or DEFAULT_MIDI_NOTES)]
+
+
+def transition_clip(from_midi, midi, pre_roll=1.5, duration=2.0, noise_db=-60.0, sampling_rate=SAMPLING_RATE,
+                    seed=0):
+    """ from_midi held for pre_roll seconds, then midi is plucked. The onset is the note change, so the
+        latency also covers flushing the previous note out of the analysis window """
+
+    onset = int(pre_roll * sampling_rate)
+    previous = guitar_tone(midi_to_frequency(from_midi), pre_roll, sampling_rate, decay=0.5)
+    tone = guitar_tone(midi_to_frequency(midi), duration, sampling_rate)
+    samples = np.concatenate([previous, tone])
+    if noise_db is not None:
+        rng = np.random.default_rng(seed + midi)
+        samples += rng.standard_normal(len(samples)) * 10 ** (noise_db / 20.0)
+    name = f"{midi_to_name(from_midi)} -> {midi_to_name(midi)}"
+    return Clip(name, np.clip(samples, -1.0, 1.0), midi, onset, sampling_rate)
+
+
+def transition_corpus(from_midi, midi_notes=None, **kwargs):
+    return [transition_clip(from_midi, midi, **kwargs) for midi in (midi_notes or DEFAULT_MIDI_NOTES)
+            if midi != from_midi]
+
+
+def load_wav(path, sampling_rate=SAMPLING_RATE):
+    """ reads a PCM WAV file as mono float samples, resampled (linearly) to sampling_rate """
+
+    source = WavFileSource(path, dtype=np.float32)
+    with source:
+        samples = source.samples.astype(np.float64)
+    rate = source.sampling_rate
+
+    if rate != sampling_rate:
+        positions = np.arange(int(len(samples) * sampling_rate / rate)) * (rate / sampling_rate)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return samples
+
+
+def wav_clip(path, expected_midi=None, onset_threshold=0.01, frame_size=1024, sampling_rate=SAMPLING_RATE):
+    """ loads a recording as a Clip. The expected note is taken from the file name unless given
+        ('E2.wav', 'A#3_take2.wav', '45.wav'); the onset is the first frame above onset_threshold RMS """
+
+    path = Path(path)
+    samples = load_wav(path, sampling_rate)
+    if expected_midi is None:
+        expected_midi = name_to_midi(re.split(r"[_\-\s.]", path.stem)[0])
+
+    onset = 0
+    for start in range(0, len(samples) - frame_size + 1, frame_size):
+        frame = samples[start:start + frame_size]
+        if np.sqrt(np.mean(np.square(frame))) >= onset_threshold:
+            onset = start
+            break
+    return Clip(path.name, samples, expected_midi, onset, sampling_rate)
+
+
+def wav_corpus(paths, **kwargs):
+    """ expands directories to the .wav files they contain """
+
+    clips = []
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.glob("*.wav")) if path.is_dir() else [path]
+        clips.extend(wav_clip(f, **kwargs) for f in files)
+    return clips
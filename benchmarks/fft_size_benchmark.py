@@ -0,0 +1,88 @@
+""" Accuracy versus FFT size for the tuner's FFT + HPS detector.
+
+    For every (window, fft size) pair and every peak refinement method, steady guitar-like tones
+    are fed chunk by chunk through a SlidingSpectrumEngine (recomputed every chunk) and an
+    HPSPipeline. The notes are detuned by a few cents so they do not sit on bin centres. Reports
+    the median and 95th percentile absolute error in cents over all estimates and the time per
+    computed spectrum (FFT + HPS + refinement):
+
+        none        centre of the HPS peak bin (the original behaviour)
+        parabolic   parabola through the magnitudes around the strongest harmonic
+        gaussian    parabola through the log magnitudes (Gaussian fit)
+        gaussian+pv gaussian, then phase-vocoder refinement from the previous spectrum
+
+    Run from the repository root:
+        python -m benchmarks.fft_size_benchmark
+        python -m benchmarks.fft_size_benchmark --sizes 8192:8192 8192:16384 51200:204800 """
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.corpus import DEFAULT_MIDI_NOTES, SAMPLING_RATE, guitar_tone, midi_to_frequency
+from tuner_utils.hps_pipeline import HPSPipeline
+from tuner_utils.spectrum_engine import SlidingSpectrumEngine
+
+CHUNK_SIZE = 1024
+DEFAULT_SIZES = ["4096:8192", "8192:8192", "8192:16384", "8192:32768", "16384:32768", "16384:65536",
+                 "51200:204800"]
+METHODS = [("none", None, False), ("parabolic", "parabolic", False), ("gaussian", "gaussian", False),
+           ("gaussian+pv", "gaussian", True)]
+DETUNE_CENTS = [-23.0, 0.0, 11.0, 37.0]
+
+
+def parse_size(text):
+    window, _, fft_size = text.partition(":")
+    window = int(window)
+    return window, int(fft_size) if fft_size else window
+
+
+def run(window, fft_size, interpolation, phase_vocoder, frequencies, duration):
+    engine = SlidingSpectrumEngine(window)
+    view = engine.view(window, fft_size)
+    pipeline = HPSPipeline(view.num_bins, fft_size, SAMPLING_RATE, num_hps=3, interpolation=interpolation)
+
+    errors = []
+    elapsed = 0.0
+    computations = 0
+    for frequency in frequencies:
+        engine.reset()
+        tone = guitar_tone(frequency, duration + window / SAMPLING_RATE, SAMPLING_RATE, decay=0.5)
+        for start in range(0, len(tone) - CHUNK_SIZE + 1, CHUNK_SIZE):
+            engine.push(tone[start:start + CHUNK_SIZE])
+            if engine.samples_written < window:
+                continue
+            begin = time.perf_counter()
+            engine.compute_view(view)
+            if phase_vocoder and view.hop:
+                estimate = pipeline.process(view.magnitude, view.spectrum, view.previous_spectrum, view.hop)
+            else:
+                estimate = pipeline.process(view.magnitude)
+            elapsed += time.perf_counter() - begin
+            computations += 1
+            errors.append(abs(1200 * np.log2(estimate / frequency)) if estimate > 0 else 1200.0)
+
+    return float(np.median(errors)), float(np.percentile(errors, 95)), elapsed / computations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="*", default=DEFAULT_SIZES, help="window[:fft size] pairs")
+    parser.add_argument("--duration", type=float, default=0.5, help="seconds analysed per note")
+    args = parser.parse_args()
+
+    frequencies = [midi_to_frequency(midi) * 2 ** (cents / 1200)
+                   for midi in DEFAULT_MIDI_NOTES for cents in DETUNE_CENTS]
+
+    print(f"{'window':>7} {'fft':>7} {'bin Hz':>7}  {'method':<12} {'median':>9} {'p95':>9} {'ms/spectrum':>12}")
+    for window, fft_size in map(parse_size, args.sizes):
+        for label, interpolation, phase_vocoder in METHODS:
+            median, p95, ms = run(window, fft_size, interpolation, phase_vocoder, frequencies, args.duration)
+            print(f"{window:>7} {fft_size:>7} {SAMPLING_RATE / fft_size:>7.2f}  {label:<12} "
+                  f"{median:>6.2f} ct {p95:>6.2f} ct {ms:>12.3f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+""" Micro-benchmark for the Harmonic Product Spectrum stage of the tuner.
+
+    Compares the original per-frame code (deepcopy of the magnitudes, fftfreq rebuilt every frame and
+    a Python loop to find the 60 Hz cutoff) with the precomputed HPSPipeline. Reports frames/sec and
+    the transient memory allocated per frame (peak traced by tracemalloc).
+
+    Run from the repository root:
+        python -m benchmarks.hps_benchmark """
+
+import argparse
+import copy
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.corpus import guitar_tone
+from tuner_utils.audio_analyser import AudioAnalyser
+from tuner_utils.hps_pipeline import HPSPipeline
+from tuner_utils.spectrum_engine import SlidingSpectrumEngine
+
+
+def legacy_hps(magnitude_data, sampling_rate, num_hps):
+    """ the HPS code as it used to run inside AudioAnalyser.run (mutates magnitude_data) """
+
+    magnitude_data_orig = copy.deepcopy(magnitude_data)
+    for i in range(2, num_hps + 1, 1):
+        hps_len = int(np.ceil(len(magnitude_data) / i))
+        magnitude_data[:hps_len] *= magnitude_data_orig[::i]
+
+    frequencies = np.fft.fftfreq(int((len(magnitude_data) * 2) / 1), 1. / sampling_rate)
+
+    for i, freq in enumerate(frequencies):
+        if freq > 60:
+            magnitude_data[:i - 1] = 0
+            break
+
+    return round(frequencies[np.argmax(magnitude_data)], 2)
+
+
+def measure(label, frame_func, frames):
+    frame_func()  # warm-up
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame_func()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    peaks = []
+    for _ in range(min(frames, 20)):
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        frame_func()
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    print(f"{label:<14} {frames / elapsed:10.1f} frames/sec   {np.mean(peaks) / 1024:10.1f} KiB allocated/frame")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--frequency", type=float, default=110.0)
+    args = parser.parse_args()
+
+    sampling_rate = AudioAnalyser.SAMPLING_RATE
+    engine = SlidingSpectrumEngine(AudioAnalyser.CHUNK_SIZE * AudioAnalyser.BUFFER_TIMES,
+                                   zero_padding=AudioAnalyser.ZERO_PADDING)
+    tone = guitar_tone(args.frequency, engine.buffer_size / sampling_rate, sampling_rate, decay=0.0)
+    engine.push((tone * 32767).astype(np.int16))
+    magnitude = engine.magnitude
+    pipeline = HPSPipeline(engine.num_bins, engine.fft_size, sampling_rate, num_hps=AudioAnalyser.NUM_HPS)
+
+    legacy_result = legacy_hps(magnitude.copy(), sampling_rate, AudioAnalyser.NUM_HPS)
+    pipeline_result = pipeline.process(magnitude)
+    print(f"{engine.num_bins} bins, tone {args.frequency} Hz -> legacy {legacy_result} Hz, pipeline {pipeline_result} Hz")
+
+    # the legacy code mutates its input, so it gets a fresh copy like AudioAnalyser.run used to produce
+    scratch = np.empty_like(magnitude)
+
+    def legacy_frame():
+        np.copyto(scratch, magnitude)
+        legacy_hps(scratch, sampling_rate, AudioAnalyser.NUM_HPS)
+
+    measure("before (legacy)", legacy_frame, args.frames)
+    measure("after (pipeline)", lambda: pipeline.process(magnitude), args.frames)
+
+
+if __name__ == "__main__":
+    main()
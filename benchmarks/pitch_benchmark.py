@@ -0,0 +1,182 @@
+""" Offline pitch-detection benchmark for the tuner and the note trainer.
+
+    Feeds synthetic guitar-like tones (and optionally WAV recordings) frame by frame through
+    AudioAnalyser.process_chunk (FFT + HPS, YIN or MPM) and NoteTrainer.detect_pitch (aubio),
+    without any audio device, and reports per detector:
+
+        latency   frames from the note onset until the first estimate within TOLERANCE_CENTS
+        error     median absolute error in cents of the estimates after that first hit
+        false +   share of all reported estimates (including those before the onset) that are
+                  more than TOLERANCE_CENTS off
+        frames/s  processing throughput
+
+    The "tuner" detector uses the register-adaptive analysis window, "tuner-fixed" the single
+    CHUNK_SIZE * BUFFER_TIMES window. --from-note E2 starts every synthetic clip with that note
+    held, so latency includes flushing the previous note out of the window.
+
+    Run from the repository root:
+        python -m benchmarks.pitch_benchmark
+        python -m benchmarks.pitch_benchmark --from-note E2
+        python -m benchmarks.pitch_benchmark --wav recordings/      (files named like E2.wav, A#3_take2.wav) """
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.corpus import midi_to_name, name_to_midi, synthetic_corpus, transition_corpus, wav_corpus
+from functions.note_trainer import NoteTrainer
+from tuner_utils.audio_analyser import AudioAnalyser
+
+FRAME_SIZE = 1024
+TOLERANCE_CENTS = 50.0
+
+
+class TunerDetector(object):
+    name = "tuner (FFT+HPS)"
+    adaptive = True
+
+    def __init__(self):
+        engine = AudioAnalyser.create_spectrum_engine(adaptive=self.adaptive)
+        self.analyser = AudioAnalyser(queue=None, spectrum_engine=engine)
+
+    def process(self, frame):
+        """ returns the estimated frequency in Hz or None """
+
+        frequency = self.analyser.process_chunk((frame * 32767).astype(np.int16))
+        return frequency if frequency else None
+
+
+class FixedWindowTunerDetector(TunerDetector):
+    name = "tuner, fixed window"
+    adaptive = False
+
+
+class TimeDomainTunerDetector(object):
+    backend = None
+
+    def __init__(self):
+        self.analyser = AudioAnalyser(queue=None, detector=self.backend)
+
+    def process(self, frame):
+        return self.analyser.process_chunk((frame * 32767).astype(np.int16))
+
+
+class YinTunerDetector(TimeDomainTunerDetector):
+    name = "tuner (YIN)"
+    backend = "yin"
+
+
+class MPMTunerDetector(TimeDomainTunerDetector):
+    name = "tuner (MPM)"
+    backend = "mpm"
+
+
+class TrainerDetector(object):
+    name = "trainer (aubio)"
+
+    def __init__(self):
+        self.trainer = NoteTrainer(None)
+        self.pitch_o = NoteTrainer.create_pitch_detector(hop_size=FRAME_SIZE)
+
+    def process(self, frame):
+        _, _, midi = self.trainer.detect_pitch(self.pitch_o, frame.astype(np.float32))
+        return None if midi is None else 440.0 * 2.0 ** ((midi - 69) / 12.0)
+
+
+DETECTORS = {
+    "tuner": TunerDetector,
+    "tuner-fixed": FixedWindowTunerDetector,
+    "tuner-yin": YinTunerDetector,
+    "tuner-mpm": MPMTunerDetector,
+    "trainer": TrainerDetector,
+}
+
+
+def run_clip(detector, clip):
+    onset_frame = clip.onset // FRAME_SIZE
+    expected = clip.expected_frequency
+    first_hit = None
+    reports = 0
+    false_positives = 0
+    errors = []
+    frames = 0
+
+    start = time.perf_counter()
+    estimates = [detector.process(frame) for frame in clip.frames(FRAME_SIZE)]
+    elapsed = time.perf_counter() - start
+
+    for index, frequency in enumerate(estimates):
+        frames += 1
+        if frequency is None:
+            continue
+        reports += 1
+        cents = 1200 * np.log2(frequency / expected)
+        hit = abs(cents) <= TOLERANCE_CENTS and index >= onset_frame
+        if not hit:
+            false_positives += 1
+        if hit and first_hit is None:
+            first_hit = index
+        if first_hit is not None:
+            errors.append(abs(cents))
+
+    return {
+        "latency": None if first_hit is None else first_hit - onset_frame,
+        "error": float(np.median(errors)) if errors else None,
+        "false_positive_rate": false_positives / reports if reports else 0.0,
+        "frames_per_sec": frames / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def _fmt(value, fmt, missing="--"):
+    return missing if value is None else format(value, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", nargs="*", default=[], help="WAV files or directories of WAV files")
+    parser.add_argument("--notes", nargs="*", default=None, help="synthetic notes, e.g. E2 A2 45")
+    parser.add_argument("--no-synthetic", action="store_true", help="only run the WAV corpus")
+    parser.add_argument("--from-note", default=None, help="hold this note before every synthetic clip, e.g. E2")
+    parser.add_argument("--noise-db", type=float, default=-60.0, help="noise floor of synthetic clips (dBFS)")
+    parser.add_argument("--detectors", nargs="*", default=list(DETECTORS), choices=list(DETECTORS))
+    args = parser.parse_args()
+
+    clips = []
+    if not args.no_synthetic:
+        notes = [name_to_midi(n) for n in args.notes] if args.notes else None
+        if args.from_note:
+            clips.extend(transition_corpus(name_to_midi(args.from_note), notes, noise_db=args.noise_db))
+        else:
+            clips.extend(synthetic_corpus(notes, noise_db=args.noise_db))
+    clips.extend(wav_corpus(args.wav, frame_size=FRAME_SIZE))
+    if not clips:
+        parser.error("nothing to benchmark")
+
+    print(f"{'clip':<24} {'detector':<18} {'latency':>8} {'error':>9} {'false +':>8} {'frames/s':>10}")
+    for name in args.detectors:
+        summary = []
+        for clip in clips:
+            result = run_clip(DETECTORS[name](), clip)
+            summary.append(result)
+            print(f"{clip.name:<24} {DETECTORS[name].name:<18} "
+                  f"{_fmt(result['latency'], 'd'):>8} "
+                  f"{_fmt(result['error'], '.1f'):>6} ct "
+                  f"{result['false_positive_rate']:>7.0%} "
+                  f"{result['frames_per_sec']:>10.0f}")
+
+        latencies = [r["latency"] for r in summary if r["latency"] is not None]
+        errors = [r["error"] for r in summary if r["error"] is not None]
+        print(f"{'-> mean over ' + str(len(clips)) + ' clips':<24} {DETECTORS[name].name:<18} "
+              f"{_fmt(np.mean(latencies) if latencies else None, '.1f'):>8} "
+              f"{_fmt(np.mean(errors) if errors else None, '.1f'):>6} ct "
+              f"{np.mean([r['false_positive_rate'] for r in summary]):>7.0%} "
+              f"{np.mean([r['frames_per_sec'] for r in summary]):>10.0f}")
+        missed = [midi_to_name(c.expected_midi) for c, r in zip(clips, summary) if r["latency"] is None]
+        if missed:
+            print(f"   never detected: {', '.join(missed)}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
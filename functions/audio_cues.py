@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import miniaudio
+except ImportError:  # optional: without it every cue is played (blocking) through playsound
+    miniaudio = None
+
+
+_decoded_cues = {}  # (file path, sample rate) -> mono float32 samples
+_decoded_cues_lock = threading.Lock()
+
+
+def get_decoded_cue(path, sample_rate):
+    """Samples of one sound file, decoded on first use and then shared by every player in the
+    process, so a new session (and its new player) does not decode the prompts again."""
+    key = (str(path), sample_rate)
+    with _decoded_cues_lock:
+        samples = _decoded_cues.get(key)
+        if samples is None:
+            decoded = miniaudio.decode_file(
+                str(path),
+                output_format=miniaudio.SampleFormat.FLOAT32,
+                nchannels=1,
+                sample_rate=sample_rate,
+            )
+            samples = np.frombuffer(decoded.samples, dtype=np.float32)
+            samples.flags.writeable = False  # shared between players and threads
+            _decoded_cues[key] = samples
+        return samples
+
+
+class AudioCuePlayer:
+    """Play the note trainer's spoken prompts from PCM decoded once, through one output stream.
+
+    Every MP3 is decoded on first use (or up front with preload()) to mono float32 at
+    SAMPLE_RATE and kept in memory for the whole process (see get_decoded_cue()); a player only
+    owns its output device. play() queues cues and returns immediately; a single output
+    device, opened on the first play(), pulls the queued samples back to back:
+
+        cues = AudioCuePlayer(Path("sounds"))
+        cues.play("E.mp3", "low.mp3", "A.mp3", 0.1, "clack.mp3")  # floats are pauses in seconds
+        cues.wait(stop_event)  # block until everything queued has been handed to the device
+
+    Without the optional miniaudio package, or without an output device, play() falls back to
+    blocking playsound calls, which is the behaviour the trainer had before.
+    """
+
+    SAMPLE_RATE = 44100
+    WAIT_INTERVAL = 0.05  # seconds between stop_event checks in wait()
+
+    def __init__(self, sound_path, sample_rate=SAMPLE_RATE):
+        self.sound_path = Path(sound_path)
+        self.sample_rate = sample_rate
+        self.device = None
+        self.use_pcm = miniaudio is not None
+        self._queue = deque()
+        self._current = None
+        self._position = 0
+        self._idle_since = time.perf_counter()
+        self._condition = threading.Condition()
+
+    def load(self, name):
+        """Return the decoded samples of one sound file, decoding it on first use in the process."""
+        return get_decoded_cue(self.sound_path / name, self.sample_rate)
+
+    def preload(self):
+        """Decode every MP3 in the sound folder now instead of at its first cue."""
+        if not self.use_pcm:
+            return
+        for path in sorted(self.sound_path.glob("*.mp3")):
+            self.load(path.name)
+
+    def _cue_samples(self, cue):
+        if isinstance(cue, (int, float)):
+            return np.zeros(int(cue * self.sample_rate), dtype=np.float32)
+        return self.load(cue)
+
+    def _open_device(self):
+        if self.device is not None:
+            return
+        device = miniaudio.PlaybackDevice(
+            output_format=miniaudio.SampleFormat.FLOAT32,
+            nchannels=1,
+            sample_rate=self.sample_rate,
+        )
+        stream = self._stream()
+        next(stream)  # prime the generator, miniaudio sends the frame counts from then on
+        device.start(stream)
+        self.device = device
+
+    def _stream(self):
+        required_frames = yield b""
+        while True:
+            block = np.zeros(required_frames, dtype=np.float32)
+            filled = 0
+            with self._condition:
+                while filled < required_frames:
+                    if self._current is None:
+                        if not self._queue:
+                            if self._idle_since is None:
+                                self._idle_since = time.perf_counter()
+                            self._condition.notify_all()
+                            break
+                        self._current = self._queue.popleft()
+                        self._position = 0
+                    count = min(required_frames - filled, len(self._current) - self._position)
+                    block[filled:filled + count] = self._current[self._position:self._position + count]
+                    filled += count
+                    self._position += count
+                    if self._position >= len(self._current):
+                        self._current = None
+            required_frames = yield block.tobytes()
+
+    def play(self, *cues):
+        """Queue sound file names (relative to the sound folder) and pauses (seconds)."""
+        if self.use_pcm:
+            try:
+                samples = [self._cue_samples(cue) for cue in cues]
+                self._open_device()
+            except Exception as exc:
+                print(f"Audio cues unavailable ({exc}), falling back to playsound.")
+                self.use_pcm = False
+            else:
+                with self._condition:
+                    self._queue.extend(samples)
+                    self._idle_since = None
+                return
+
+        from playsound3 import playsound
+
+        for cue in cues:
+            if isinstance(cue, (int, float)):
+                time.sleep(cue)
+            else:
+                playsound(self.sound_path / cue)
+        with self._condition:
+            self._idle_since = time.perf_counter()
+
+    @property
+    def busy(self):
+        with self._condition:
+            return self._current is not None or bool(self._queue)
+
+    @property
+    def idle_since(self):
+        """perf_counter() time at which the last queued sample was handed to the device, or None
+        while cues are playing."""
+        with self._condition:
+            return self._idle_since
+
+    def wait(self, stop_event=None, timeout=None):
+        """Block until every queued cue has been played. Returns False (and drops the remaining
+        cues) if stop_event is set first, or False on timeout."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._condition:
+            while self._current is not None or self._queue:
+                if stop_event is not None and stop_event.is_set():
+                    self._drop_queued()
+                    return False
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return False
+                self._condition.wait(self.WAIT_INTERVAL)
+        return True
+
+    def _drop_queued(self):
+        self._queue.clear()
+        self._current = None
+        if self._idle_since is None:
+            self._idle_since = time.perf_counter()
+
+    def stop(self):
+        """Drop every queued cue, including the one that is playing."""
+        with self._condition:
+            self._drop_queued()
+
+    def close(self, drain=True):
+        """Close the output device, after the queued cues have played unless drain=False."""
+        if drain:
+            self.wait(timeout=10)
+        self.stop()
+        if self.device is not None:
+            self.device.close()
+            self.device = None
@@ -0,0 +1,153 @@
+import random
+import threading
+
+# Standard tuning and the two fret ranges the trainer asks for. Every note the trainer prompts
+# is derived from this, together with its sharp and flat spellings.
+FRETBOARD_DEFINITION = """
+# string  open note (high E first)
+string 1st E4
+string 2nd B3
+string 3rd G3
+string 4th D3
+string 5th A2
+string 6th E2
+
+# register  frets
+register low 0-11
+register high 12-21
+"""
+
+SHARP_NAMES = ("C", "C♯", "D", "D♯", "E", "F", "F♯", "G", "G♯", "A", "A♯", "B")
+FLAT_NAMES = ("C", "D♭", "D", "E♭", "E", "F", "G♭", "G", "A♭", "A", "B♭", "B")
+MIDI_RANGE = 128
+
+
+def parse_note_name(text):
+    """Return the MIDI number of a scientific pitch name such as "E2" or "A♯3"."""
+    name, octave = text[:-1], int(text[-1])
+    pitch_class = SHARP_NAMES.index(name) if name in SHARP_NAMES else FLAT_NAMES.index(name)
+    return 12 * (octave + 1) + pitch_class
+
+
+def midi_to_name(midi):
+    """The trainer's name for a pitch: "E", or "A♯/B♭" for an accidental."""
+    pitch_class = midi % 12
+    sharp, flat = SHARP_NAMES[pitch_class], FLAT_NAMES[pitch_class]
+    return sharp if sharp == flat else f"{sharp}/{flat}"
+
+
+class NoteModel:
+    """Immutable index of the notes the trainer can prompt, built once from a text definition.
+
+    Every (string, register, note name) target is one entry of the flat, parallel tuples
+    strings / registers / notes / midis. Entries are grouped per (string, register), so
+    random_note() draws a string, then a register, then a spelling, each uniformly, in
+    constant time. name_for_midi() is a tuple lookup and midi_for() a dict lookup.
+    """
+
+    __slots__ = (
+        "string_names",
+        "register_names",
+        "strings",
+        "registers",
+        "notes",
+        "midis",
+        "_groups",
+        "_midi_by_target",
+        "_name_by_midi",
+    )
+
+    def __init__(self, definition=FRETBOARD_DEFINITION):
+        open_notes = []
+        fret_ranges = []
+        for line in definition.splitlines():
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            kind, name, value = fields
+            if kind == "string":
+                open_notes.append((name, parse_note_name(value)))
+            elif kind == "register":
+                first, last = (int(fret) for fret in value.split("-"))
+                fret_ranges.append((name, first, last))
+            else:
+                raise ValueError(f"Unknown fretboard definition line: {line!r}")
+
+        strings, registers, notes, midis = [], [], [], []
+        groups = []  # (first entry, entry count) per string, per register
+        for string, open_midi in open_notes:
+            string_groups = []
+            for register, first_fret, last_fret in fret_ranges:
+                start = len(midis)
+                pitches = range(open_midi + first_fret, open_midi + last_fret + 1)
+                # Naturals first, then the sharp and the flat spelling of each accidental.
+                naturals = [m for m in pitches if SHARP_NAMES[m % 12] == FLAT_NAMES[m % 12]]
+                accidentals = [m for m in pitches if SHARP_NAMES[m % 12] != FLAT_NAMES[m % 12]]
+                spellings = [(SHARP_NAMES[m % 12], m) for m in naturals + accidentals]
+                spellings += [(FLAT_NAMES[m % 12], m) for m in accidentals]
+                for note, midi in spellings:
+                    strings.append(string)
+                    registers.append(register)
+                    notes.append(note)
+                    midis.append(midi)
+                string_groups.append((start, len(midis) - start))
+            groups.append(tuple(string_groups))
+
+        self.string_names = tuple(string for string, _ in open_notes)
+        self.register_names = tuple(register for register, _, _ in fret_ranges)
+        self.strings = tuple(strings)
+        self.registers = tuple(registers)
+        self.notes = tuple(notes)
+        self.midis = tuple(midis)
+        self._groups = tuple(groups)
+        self._midi_by_target = {
+            (string, register, note): midi
+            for string, register, note, midi in zip(strings, registers, notes, midis)
+        }
+        names = [None] * MIDI_RANGE
+        for midi in set(midis):
+            names[midi] = midi_to_name(midi)
+        self._name_by_midi = tuple(names)
+
+    def __setattr__(self, name, value):
+        if hasattr(self, "_name_by_midi"):
+            raise AttributeError("NoteModel is immutable")
+        object.__setattr__(self, name, value)
+
+    def __len__(self):
+        return len(self.midis)
+
+    def midi_for(self, string, register, note):
+        """MIDI number of a target, e.g. midi_for("6th", "low", "A") == 45."""
+        return self._midi_by_target[(string, register, note)]
+
+    def name_for_midi(self, midi):
+        """Name of a played MIDI pitch ("A♯/B♭"), or None if it is not on the trained fretboard."""
+        midi = int(midi)
+        if 0 <= midi < MIDI_RANGE:
+            return self._name_by_midi[midi]
+        return None
+
+    def random_index(self, rng=random):
+        """Index of a random entry: uniform string, then register, then spelling."""
+        string_groups = self._groups[rng.randrange(len(self._groups))]
+        start, count = string_groups[rng.randrange(len(string_groups))]
+        return start + rng.randrange(count)
+
+    def random_note(self, rng=random):
+        """A random target as {"string", "low_high", "note"}."""
+        index = self.random_index(rng)
+        return {"string": self.strings[index], "low_high": self.registers[index], "note": self.notes[index]}
+
+
+_note_model = None
+_note_model_lock = threading.Lock()
+
+
+def get_note_model():
+    """The process-wide NoteModel, shared by every trainer and session."""
+    global _note_model
+    with _note_model_lock:
+        if _note_model is None:
+            _note_model = NoteModel()
+        return _note_model
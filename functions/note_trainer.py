@@ -1,26 +1,41 @@
-import pickle
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from random import choice as rc
-from time import sleep
 
 import aubio
 import numpy as np
-import pyaudio
-from playsound3 import playsound
+
+from functions.audio_cues import AudioCuePlayer
+from functions.note_model import get_note_model
+from tuner_utils.audio_hub import get_audio_hub
+from tuner_utils.audio_source import to_float32
 
 
 class NoteTrainer:
-    def __init__(self, input_device, input_rms_threshold=0.01):
+    SAMPLE_RATE = 44100
+    BUFFER_SIZE = 1024  # hop size, samples per stream read
+    PITCH_WINDOW_SIZE = 4096
+    PITCH_TOLERANCE = 0.8
+    MIN_MIDI = 40  # low E
+    MAX_MIDI = 85
+    PROMPT_ECHO_GUARD = 0.08  # seconds after the last prompt sample still masked (output latency, echo)
+
+    def __init__(self, input_device, input_rms_threshold=0.01, source=None):
         self.input_device = input_device
         self.input_rms_threshold = max(0.0, float(input_rms_threshold))
+        # Any tuner_utils.audio_source.AudioSource; defaults to a subscription to input_device on
+        # the shared AudioHub, so opening/closing it per trial does not reopen the device.
+        if source is None:
+            source = get_audio_hub().subscribe(input_device, dtype=np.float32)
+        self.source = source
+        self.pitch_o = None
+        self.session_open = False
         self.base_path = Path(__file__).resolve().parents[1]
         self.sound_path = self.base_path / "sounds"
-
-        with open(self.base_path / "guitar_note_dictionary.pkl", "rb") as f:
-            self.guitar_note_dictionary = pickle.load(f)
-
-        with open(self.base_path / "all_note_dictionary.pkl", "rb") as f:
-            self.all_note_dictionary = pickle.load(f)
+        # Prompts are decoded once and played through one output stream.
+        self.cues = AudioCuePlayer(self.sound_path)
+        # Targets and note names, built once per process and shared by every trainer.
+        self.note_model = get_note_model()
 
     @staticmethod
     def _safe_callback(callback, *args):
@@ -32,6 +47,69 @@ class NoteTrainer:
             # UI callbacks are best-effort and must not interrupt audio capture.
             pass
 
+    @classmethod
+    def create_pitch_detector(cls, samplerate=None, hop_size=None):
+        """Build the aubio pitch detector used for trials, reporting MIDI note numbers."""
+        samplerate = samplerate or cls.SAMPLE_RATE
+        hop_size = hop_size or cls.BUFFER_SIZE
+        pitch_o = aubio.pitch("default", cls.PITCH_WINDOW_SIZE, hop_size, samplerate)
+        pitch_o.set_unit("midi")
+        pitch_o.set_tolerance(cls.PITCH_TOLERANCE)
+        return pitch_o
+
+    def open_session(self):
+        """Open the input and build the pitch detector once for a series of trials."""
+        if self.session_open:
+            return
+        self.cues.preload()
+        self.source.open()
+        try:
+            self.pitch_o = self.create_pitch_detector(self.source.sampling_rate, self.BUFFER_SIZE)
+        except Exception:
+            self.source.close()
+            raise
+        self.session_open = True
+
+    def close_session(self):
+        """Close the input opened by open_session()."""
+        if not self.session_open:
+            return
+        self.session_open = False
+        self.pitch_o = None
+        self.source.close()
+        self.cues.close()
+
+    @contextmanager
+    def session(self):
+        """Keep the input and the pitch detector open across every record() call in the block."""
+        self.open_session()
+        try:
+            yield self
+        finally:
+            self.close_session()
+
+    def reset_pitch_detector(self):
+        """Flush aubio's analysis window with silence so no audio from the previous trial leaks in."""
+        silence = np.zeros(self.BUFFER_SIZE, dtype=np.float32)
+        for _ in range(self.PITCH_WINDOW_SIZE // self.BUFFER_SIZE):
+            self.pitch_o(silence)
+
+    def detect_pitch(self, pitch_o, signal):
+        """Analyse one float32 frame and return (rms, input_detected, midi).
+
+        midi is the unrounded detector output, or None when the frame is below the input
+        threshold or the rounded pitch is outside the guitar range.
+        """
+        rms = float(np.sqrt(np.mean(np.square(signal)))) if signal.size else 0.0
+        input_detected = rms >= self.input_rms_threshold
+        if not input_detected:
+            return rms, False, None
+
+        midi = float(pitch_o(signal)[0])
+        if not self.MIN_MIDI <= round(midi) <= self.MAX_MIDI:
+            return rms, True, None
+        return rms, True, midi
+
     def record(
         self,
         record_duration=3,
@@ -40,11 +118,19 @@ class NoteTrainer:
         end_on_incorrect=False,
         level_callback=None,
         countdown_callback=None,
+        prompt=None,
     ):
-        p = pyaudio.PyAudio()
-        buffer_size = 1024
-        samplerate = 44100
-        stream = None
+        """Listen for up to record_duration seconds and collect the detected MIDI notes.
+
+        prompt: cues for self.cues (file names, pauses in seconds) to play first. They are
+        queued without blocking and the input is read while they play, with the pitch detector
+        fed silence instead of the prompt's own audio. The detector is therefore primed when the
+        mask lifts, PROMPT_ECHO_GUARD seconds after the last prompt sample, and record_duration
+        counts from that moment.
+        """
+        source = self.source
+        buffer_size = self.BUFFER_SIZE
+        samplerate = source.sampling_rate
         notes_played = []
         early_end_reason = None
         early_end_pitch = None
@@ -52,34 +138,43 @@ class NoteTrainer:
         incorrect_hits = 0
         required_hits = 2
 
+        # Outside of a session the input is opened and closed for this trial only.
+        owns_session = not self.session_open
         try:
-            stream = p.open(
-                format=pyaudio.paFloat32,
-                channels=1,
-                rate=samplerate,
-                input=True,
-                frames_per_buffer=buffer_size,
-                input_device_index=self.input_device,
-            )
-
-            tolerance = 0.8
-            win_s = 4096
-            hop_s = buffer_size
-            pitch_o = aubio.pitch("default", win_s, hop_s, samplerate)
-            pitch_o.set_unit("midi")
-            pitch_o.set_tolerance(tolerance)
+            if owns_session:
+                self.open_session()
+            if prompt:
+                self.cues.play(*prompt)
+            if not owns_session:
+                # Skip audio captured since the last trial and forget its pitch.
+                source.discard_buffered()
+                self.reset_pitch_detector()
+            pitch_o = self.pitch_o
+            silence = np.zeros(buffer_size, dtype=np.float32)
+            prompt_masked = bool(prompt)
 
             total_frames = 0
             while True:
                 if stop_event is not None and stop_event.is_set():
+                    self.cues.stop()
                     break
                 if record_duration and ((record_duration * samplerate) <= total_frames):
                     break
 
-                audiobuffer = stream.read(buffer_size, exception_on_overflow=False)
-                signal = np.frombuffer(audiobuffer, dtype=np.float32)
-                rms = float(np.sqrt(np.mean(np.square(signal)))) if signal.size else 0.0
-                input_detected = rms >= self.input_rms_threshold
+                signal = to_float32(source.read(buffer_size))
+                if signal.size < buffer_size:
+                    # a finite source (file, array, pipe) has ended; aubio needs whole hops
+                    break
+
+                if prompt_masked:
+                    idle_since = self.cues.idle_since
+                    prompt_masked = idle_since is None or time.perf_counter() < idle_since + self.PROMPT_ECHO_GUARD
+                if prompt_masked:
+                    # Keep the stream and the detector running, but never analyse the prompt itself.
+                    pitch_o(silence)
+                    continue
+
+                rms, input_detected, midi = self.detect_pitch(pitch_o, signal)
                 self._safe_callback(level_callback, rms, input_detected)
 
                 total_frames += len(signal)
@@ -90,11 +185,8 @@ class NoteTrainer:
                     )
                     self._safe_callback(countdown_callback, remaining_seconds, remaining_fraction)
 
-                if not input_detected:
-                    continue
-
-                pitch = round(pitch_o(signal)[0])
-                if 40 <= pitch <= 85:
+                if midi is not None:
+                    pitch = round(midi)
                     notes_played.append(pitch)
                     if expected_midi is not None:
                         if pitch == expected_midi:
@@ -113,10 +205,8 @@ class NoteTrainer:
                                 break
 
         finally:
-            if stream is not None:
-                stream.stop_stream()
-                stream.close()
-            p.terminate()
+            if owns_session:
+                self.close_session()
 
         return {
             "notes_played": notes_played,
@@ -125,16 +215,10 @@ class NoteTrainer:
         }
 
     def find_note(self, val):
-        for key, values in self.all_note_dictionary.items():
-            if val in values:
-                return key
-        return None
+        return self.note_model.name_for_midi(val)
 
     def random_note(self):
-        string = rc(list(self.guitar_note_dictionary.keys()))
-        low_high = rc(list(self.guitar_note_dictionary[string].keys()))
-        note = rc(list(self.guitar_note_dictionary[string][low_high].keys()))
-        return {"string": string, "low_high": low_high, "note": note}
+        return self.note_model.random_note()
 
     @staticmethod
     def _note_to_sound_name(note):
@@ -146,10 +230,13 @@ class NoteTrainer:
             .replace("/", "or")
         )
 
-    def _play(self, filename, stop_event=None):
+    def _play(self, *cues, stop_event=None, wait=True):
+        """Queue prompt sounds (file names or pauses in seconds); wait=True blocks until played."""
         if stop_event is not None and stop_event.is_set():
             return
-        playsound(self.sound_path / filename)
+        self.cues.play(*cues)
+        if wait:
+            self.cues.wait(stop_event)
 
     def play_game(
         self,
@@ -163,7 +250,7 @@ class NoteTrainer:
         countdown_callback=None,
     ):
         note_sound = self._note_to_sound_name(note)
-        expected = self.guitar_note_dictionary[string][low_high][note]
+        expected = self.note_model.midi_for(string, low_high, note)
 
         if stop_event is not None and stop_event.is_set():
             return {
@@ -176,12 +263,8 @@ class NoteTrainer:
             }
 
         print(f"Play {string} string, {low_high} {note}.")
-        self._play(f"{string}.mp3", stop_event=stop_event)
-        self._play(f"{low_high}.mp3", stop_event=stop_event)
-        self._play(f"{note_sound}.mp3", stop_event=stop_event)
-        sleep(0.1)
-        self._play("clack.mp3", stop_event=stop_event)
-
+        # The prompt plays while the input is already being read (and masked), queued after any
+        # result cues of the previous trial; listening starts as soon as the clack has played.
         recording = self.record(
             record_duration=time_per_guess,
             stop_event=stop_event,
@@ -189,6 +272,7 @@ class NoteTrainer:
             end_on_incorrect=end_on_incorrect,
             level_callback=level_callback,
             countdown_callback=countdown_callback,
+            prompt=[f"{string}.mp3", f"{low_high}.mp3", f"{note_sound}.mp3", 0.1, "clack.mp3"],
         )
         played_notes = recording["notes_played"]
 
@@ -203,7 +287,7 @@ class NoteTrainer:
             }
 
         if recording["ended_early_reason"] == "correct":
-            self._play("correct.mp3", stop_event=stop_event)
+            self._play("correct.mp3", stop_event=stop_event, wait=False)
             print("Correct!")
             return {
                 "cancelled": False,
@@ -215,14 +299,19 @@ class NoteTrainer:
             }
 
         if recording["ended_early_reason"] == "incorrect":
-            self._play("incorrect.mp3", stop_event=stop_event)
             wrong_pitch = recording.get("ended_early_pitch")
             incorrect_note = self.find_note(wrong_pitch) if wrong_pitch is not None else None
             if incorrect_note is not None:
-                self._play("you_played.mp3", stop_event=stop_event)
-                self._play(f"{self._note_to_sound_name(incorrect_note)}.mp3", stop_event=stop_event)
+                self._play(
+                    "incorrect.mp3",
+                    "you_played.mp3",
+                    f"{self._note_to_sound_name(incorrect_note)}.mp3",
+                    stop_event=stop_event,
+                    wait=False,
+                )
                 print(f"Incorrect. You played {incorrect_note}.")
             else:
+                self._play("incorrect.mp3", stop_event=stop_event, wait=False)
                 print("Incorrect.")
             return {
                 "cancelled": False,
@@ -246,7 +335,7 @@ class NoteTrainer:
 
         final_note = int(played_notes[-1])
         if final_note == expected:
-            self._play("correct.mp3", stop_event=stop_event)
+            self._play("correct.mp3", stop_event=stop_event, wait=False)
             print("Correct!")
             return {
                 "cancelled": False,
@@ -257,13 +346,18 @@ class NoteTrainer:
                 "played_note": note,
             }
 
-        self._play("incorrect.mp3", stop_event=stop_event)
         incorrect_note = self.find_note(final_note)
         if incorrect_note is not None:
-            self._play("you_played.mp3", stop_event=stop_event)
-            self._play(f"{self._note_to_sound_name(incorrect_note)}.mp3", stop_event=stop_event)
+            self._play(
+                "incorrect.mp3",
+                "you_played.mp3",
+                f"{self._note_to_sound_name(incorrect_note)}.mp3",
+                stop_event=stop_event,
+                wait=False,
+            )
             print(f"Incorrect. You played {incorrect_note}.")
         else:
+            self._play("incorrect.mp3", stop_event=stop_event, wait=False)
             print("Incorrect.")
 
         return {
@@ -1,51 +1,306 @@
 # Database
+import atexit
 import datetime
+import queue
 import sqlite3
+import threading
+import time
 from pathlib import Path
 
-import matplotlib.pyplot as plt
-
 DATABASE_PATH = Path(__file__).resolve().parents[1] / "databases" / "score_database.db"
 
+# Applied to every new connection. WAL lets the UI read while a worker writes, and with WAL
+# synchronous=NORMAL only syncs at checkpoints instead of on every commit.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+)
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+_schema_ready = False
+_schema_lock = threading.Lock()
+
 
 def _connect():
-    # Centralized sqlite connection settings used by all DB operations.
-    DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    return sqlite3.connect(
-        DATABASE_PATH,
-        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+    # Centralized sqlite connection settings used by all DB operations. Each thread keeps one
+    # open connection (sqlite3 connections must stay on the thread that created them); use it
+    # as a context manager for a transaction, it is not closed at the end of the block.
+    # The first connection of the process also brings the schema up to date.
+    con = getattr(_local, "connection", None)
+    if con is None:
+        DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(
+            DATABASE_PATH,
+            detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            con.execute(pragma)
+        try:
+            _ensure_schema(con)
+        except BaseException:
+            con.close()
+            raise
+        _local.connection = con
+        with _connections_lock:
+            _connections.append(con)
+    return con
+
+
+def _ensure_schema(con):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            migrate_database(con)
+            _schema_ready = True
+
+
+def close_connection():
+    # Close the calling thread's connection, e.g. before a worker thread finishes.
+    con = getattr(_local, "connection", None)
+    if con is None:
+        return
+    _local.connection = None
+    with _connections_lock:
+        if con in _connections:
+            _connections.remove(con)
+    con.close()
+
+
+@atexit.register
+def close_all_connections():
+    with _connections_lock:
+        connections = list(_connections)
+        _connections.clear()
+    for con in connections:
+        try:
+            con.close()
+        except sqlite3.ProgrammingError:
+            # Connections of other, still running threads cannot be closed from here.
+            pass
+
+
+def _migration_1_logs(cur):
+    # The original schema: one row per trial and one per finished game.
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS score_log("
+        "Date TIMESTAMP, GameID INTEGER, TimePerGuess INTEGER, TotalTrials INTEGER, "
+        "TrialNumber INTEGER, TargetString VARCHAR(3), TargetLowHigh VARCHAR(4), "
+        "TargetNote VARCHAR(2), PlayedNote VARCHAR(8), IsCorrect BOOLEAN)"
+    )
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS final_score_log("
+        "Date TIMESTAMP, GameID INTEGER, TimePerGuess INTEGER, "
+        "TotalTrials INTEGER, TotalCorrect INTEGER)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_score_log_game "
+        "ON score_log(GameID, TrialNumber)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_final_score_combo "
+        "ON final_score_log(TotalTrials, TimePerGuess, TotalCorrect)"
     )
 
 
-def create_database():
-    with _connect() as con:
-        cur = con.cursor()
+def _migration_2_games(cur):
+    # AUTOINCREMENT never hands out an ID twice, even after rows are deleted.
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS games("
+        "GameID INTEGER PRIMARY KEY AUTOINCREMENT, StartedAt TIMESTAMP, "
+        "TimePerGuess INTEGER, TotalTrials INTEGER, EndOnIncorrect BOOLEAN)"
+    )
+    # Register the games already logged, so their IDs stay valid and new IDs continue after them.
+    for table in ("score_log", "final_score_log"):
         cur.execute(
-            "CREATE TABLE IF NOT EXISTS score_log("
-            "Date TIMESTAMP, GameID INTEGER, TimePerGuess INTEGER, TotalTrials INTEGER, "
-            "TrialNumber INTEGER, TargetString VARCHAR(3), TargetLowHigh VARCHAR(4), "
-            "TargetNote VARCHAR(2), PlayedNote VARCHAR(8), IsCorrect BOOLEAN)"
+            "INSERT OR IGNORE INTO games(GameID, StartedAt, TimePerGuess, TotalTrials) "
+            "SELECT GameID, MIN(Date), MIN(TimePerGuess), MIN(TotalTrials) "
+            f"FROM {table} WHERE GameID IS NOT NULL GROUP BY GameID"
         )
+
+
+def _migration_3_stats_tables(cur):
+    # Aggregates kept up to date by triggers, so the stats windows never scan the logs:
+    #   missed_notes  incorrect trials per target note
+    #   best_scores   one row per trials/time-per-guess combo with its best score
+    tables = {row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS missed_notes("
+        "TargetString VARCHAR(3), TargetLowHigh VARCHAR(4), TargetNote VARCHAR(2), "
+        "TotalIncorrect INTEGER NOT NULL DEFAULT 0, "
+        "PRIMARY KEY (TargetString, TargetLowHigh, TargetNote))"
+    )
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS best_scores("
+        "TotalTrials INTEGER, TimePerGuess INTEGER, BestCorrect INTEGER, "
+        "PRIMARY KEY (TotalTrials, TimePerGuess))"
+    )
+
+    cur.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_missed_notes_insert AFTER INSERT ON score_log "
+        "WHEN NEW.IsCorrect = 0 BEGIN "
+        "INSERT INTO missed_notes(TargetString, TargetLowHigh, TargetNote, TotalIncorrect) "
+        "VALUES (NEW.TargetString, NEW.TargetLowHigh, NEW.TargetNote, 1) "
+        "ON CONFLICT(TargetString, TargetLowHigh, TargetNote) "
+        "DO UPDATE SET TotalIncorrect = TotalIncorrect + 1; "
+        "END"
+    )
+    cur.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_missed_notes_delete AFTER DELETE ON score_log "
+        "WHEN OLD.IsCorrect = 0 BEGIN "
+        "UPDATE missed_notes SET TotalIncorrect = TotalIncorrect - 1 "
+        "WHERE TargetString = OLD.TargetString AND TargetLowHigh = OLD.TargetLowHigh "
+        "AND TargetNote = OLD.TargetNote; "
+        "DELETE FROM missed_notes WHERE TotalIncorrect <= 0; "
+        "END"
+    )
+    cur.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_best_scores_insert AFTER INSERT ON final_score_log BEGIN "
+        "INSERT INTO best_scores(TotalTrials, TimePerGuess, BestCorrect) "
+        "VALUES (NEW.TotalTrials, NEW.TimePerGuess, NEW.TotalCorrect) "
+        "ON CONFLICT(TotalTrials, TimePerGuess) "
+        "DO UPDATE SET BestCorrect = MAX(BestCorrect, excluded.BestCorrect); "
+        "END"
+    )
+    cur.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_best_scores_delete AFTER DELETE ON final_score_log BEGIN "
+        "DELETE FROM best_scores WHERE TotalTrials = OLD.TotalTrials AND TimePerGuess = OLD.TimePerGuess; "
+        "INSERT INTO best_scores(TotalTrials, TimePerGuess, BestCorrect) "
+        "SELECT TotalTrials, TimePerGuess, MAX(TotalCorrect) FROM final_score_log "
+        "WHERE TotalTrials = OLD.TotalTrials AND TimePerGuess = OLD.TimePerGuess "
+        "GROUP BY TotalTrials, TimePerGuess; "
+        "END"
+    )
+
+    # Fill new aggregate tables from the history logged before they existed.
+    if "missed_notes" not in tables:
         cur.execute(
-            "CREATE TABLE IF NOT EXISTS final_score_log("
-            "Date TIMESTAMP, GameID INTEGER, TimePerGuess INTEGER, "
-            "TotalTrials INTEGER, TotalCorrect INTEGER)"
+            "INSERT INTO missed_notes(TargetString, TargetLowHigh, TargetNote, TotalIncorrect) "
+            "SELECT TargetString, TargetLowHigh, TargetNote, COUNT(*) FROM score_log "
+            "WHERE IsCorrect = 0 GROUP BY TargetString, TargetLowHigh, TargetNote"
         )
+    if "best_scores" not in tables:
         cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_score_log_game "
-            "ON score_log(GameID, TrialNumber)"
+            "INSERT INTO best_scores(TotalTrials, TimePerGuess, BestCorrect) "
+            "SELECT TotalTrials, TimePerGuess, MAX(TotalCorrect) FROM final_score_log "
+            "GROUP BY TotalTrials, TimePerGuess"
         )
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_final_score_combo "
-            "ON final_score_log(TotalTrials, TimePerGuess, TotalCorrect)"
+
+
+def _migration_4_covering_indexes(cur):
+    # One covering index per read query, so each is answered from its index alone:
+    #   get_highscores (and the best_scores delete trigger)  final_score_log by combo, best first
+    #   get_top_incorrect                                     missed_notes by count
+    #   missed-note recounts                                  incorrect score_log rows by target
+    # They replace the narrower indexes some databases were created with.
+    cur.execute("DROP INDEX IF EXISTS idx_final_score_combo")
+    cur.execute("DROP INDEX IF EXISTS idx_missed_notes_total")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_final_score_highscores "
+        "ON final_score_log(TotalTrials, TimePerGuess, TotalCorrect DESC, GameID, Date)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_missed_notes_top "
+        "ON missed_notes(TotalIncorrect DESC, TargetString, TargetLowHigh, TargetNote)"
+    )
+    # best_scores is small and derived: rebuild it as a WITHOUT ROWID table, whose primary key
+    # is the table itself and already in get_trial_time_combos order.
+    cur.execute("DROP TABLE IF EXISTS best_scores")
+    cur.execute(
+        "CREATE TABLE best_scores("
+        "TotalTrials INTEGER, TimePerGuess INTEGER, BestCorrect INTEGER, "
+        "PRIMARY KEY (TotalTrials DESC, TimePerGuess)) WITHOUT ROWID"
+    )
+    cur.execute(
+        "INSERT INTO best_scores(TotalTrials, TimePerGuess, BestCorrect) "
+        "SELECT TotalTrials, TimePerGuess, MAX(TotalCorrect) FROM final_score_log "
+        "GROUP BY TotalTrials, TimePerGuess"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_score_log_missed "
+        "ON score_log(IsCorrect, TargetString, TargetLowHigh, TargetNote)"
+    )
+
+
+def _migration_5_game_links(cur):
+    # Logged rows must belong to a registered game. The log tables predate games and SQLite
+    # cannot add a foreign key to an existing table, so triggers enforce the link instead, the
+    # same way for new and upgraded databases.
+    for table in ("score_log", "final_score_log"):
+        for event in ("INSERT", "UPDATE OF GameID"):
+            name = f"trg_{table}_game_{event.split()[0].lower()}"
+            cur.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {name} BEFORE {event} ON {table} "
+                "WHEN NEW.GameID IS NOT NULL "
+                "AND NOT EXISTS (SELECT 1 FROM games WHERE GameID = NEW.GameID) BEGIN "
+                f"SELECT RAISE(ABORT, 'unknown GameID in {table}'); "
+                "END"
+            )
+
+
+# Schema history, oldest first. PRAGMA user_version holds the number of migrations applied;
+# append new ones here and never edit one that has shipped. Databases created before the
+# version was tracked report 0, so every migration must also work on a database that already
+# has (some of) its tables (hence IF NOT EXISTS everywhere).
+MIGRATIONS = (
+    _migration_1_logs,
+    _migration_2_games,
+    _migration_3_stats_tables,
+    _migration_4_covering_indexes,
+    _migration_5_game_links,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def _schema_version(con):
+    return con.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate_database(con=None):
+    # Apply the migrations this database has not seen yet, each in its own transaction together
+    # with the version bump. The version is re-read under the write lock, so two processes
+    # starting at once apply every migration exactly once.
+    con = con or _connect()
+    version = _schema_version(con)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"{DATABASE_PATH} has schema version {version}, this version only knows {SCHEMA_VERSION}"
         )
+    while version < SCHEMA_VERSION:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            version = _schema_version(con)
+            if version < SCHEMA_VERSION:
+                MIGRATIONS[version](con.cursor())
+                version += 1
+                con.execute(f"PRAGMA user_version = {version}")
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+    return version
 
 
-def get_current_game_id():
+def create_database():
+    # Kept for callers of the old API: a new database is simply migrated from version 0.
+    migrate_database()
+
+
+def create_game(time_per_guess, trials, end_on_incorrect=False):
+    # Register a new session and return its GameID (a single insert, never reused).
     with _connect() as con:
-        cur = con.cursor()
-        latest_id = cur.execute("SELECT MAX(GameID) FROM score_log").fetchone()[0]
-    return latest_id + 1 if latest_id is not None else 1
+        cur = con.execute(
+            "INSERT INTO games(StartedAt, TimePerGuess, TotalTrials, EndOnIncorrect) "
+            "VALUES (?, ?, ?, ?)",
+            (datetime.datetime.now(), time_per_guess, trials, end_on_incorrect),
+        )
+        return cur.lastrowid
 
 
 def insert_trial(
@@ -63,8 +318,7 @@ def insert_trial(
     with _connect() as con:
         con.execute(
             insert_query,
-            (
-                datetime.datetime.now(),
+            _trial_row(
                 game_id,
                 time_per_guess,
                 trials,
@@ -78,6 +332,31 @@ def insert_trial(
         )
 
 
+def _trial_row(
+    game_id,
+    time_per_guess,
+    trials,
+    trial_number,
+    target_string,
+    target_lowhigh,
+    target_note,
+    played_note,
+    is_correct,
+):
+    return (
+        datetime.datetime.now(),
+        game_id,
+        time_per_guess,
+        trials,
+        trial_number,
+        target_string,
+        target_lowhigh,
+        target_note,
+        played_note,
+        is_correct,
+    )
+
+
 def insert_trials_bulk(trials_to_insert):
     # Batch write trial rows to reduce per-trial transaction overhead.
     insert_query = "INSERT INTO score_log VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);"
@@ -85,6 +364,93 @@ def insert_trials_bulk(trials_to_insert):
         con.executemany(insert_query, trials_to_insert)
 
 
+class TrialWriter:
+    """Collect trial rows on the trial path and write them from a background thread.
+
+    add_trial() only timestamps the row and queues it. The writer thread inserts everything
+    queued with one executemany() transaction every FLUSH_INTERVAL seconds, on flush() and
+    on close(). flush() and close() block until the rows are written and re-raise the first
+    error the writer hit.
+    """
+
+    FLUSH_INTERVAL = 5.0  # seconds
+
+    def __init__(self, flush_interval=None):
+        self.flush_interval = self.FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._rows = queue.Queue()
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="TrialWriter", daemon=True)
+        self._thread.start()
+
+    def add_trial(self, *trial):
+        """Queue one trial; takes the same arguments as insert_trial()."""
+        if self._closed:
+            raise RuntimeError("TrialWriter is closed")
+        self._rows.put(_trial_row(*trial))
+
+    def _run(self):
+        try:
+            running = True
+            while running:
+                # Collect rows until the interval is over, a flush is requested or close() is called.
+                pending = []
+                flush_done = None
+                deadline = time.monotonic() + self.flush_interval
+                while running and flush_done is None:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = self._rows.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        running = False
+                    elif isinstance(item, threading.Event):
+                        flush_done = item
+                    else:
+                        pending.append(item)
+
+                if pending:
+                    try:
+                        insert_trials_bulk(pending)
+                    except sqlite3.Error as exc:
+                        if self._error is None:
+                            self._error = exc
+                if flush_done is not None:
+                    flush_done.set()
+        finally:
+            close_connection()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def flush(self):
+        """Write every queued trial now and wait for it."""
+        if self._thread.is_alive():
+            done = threading.Event()
+            self._rows.put(done)
+            done.wait()
+        self._raise_error()
+
+    def close(self):
+        """Write the remaining trials and stop the writer thread."""
+        if not self._closed:
+            self._closed = True
+            self._rows.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
 def insert_final_score(game_id, time_per_guess, trials, num_correct):
     insert_query = "INSERT INTO final_score_log VALUES (?, ?, ?, ?, ?);"
     with _connect() as con:
@@ -103,11 +469,11 @@ def insert_final_score(game_id, time_per_guess, trials, num_correct):
 def get_best_score(time_per_guess, trials, num_correct):
     with _connect() as con:
         cur = con.cursor()
-        previous_best = cur.execute(
-            "SELECT MAX(TotalCorrect) FROM final_score_log "
-            "WHERE TimePerGuess = ? AND TotalTrials = ?",
-            (time_per_guess, trials),
-        ).fetchone()[0]
+        row = cur.execute(
+            "SELECT BestCorrect FROM best_scores WHERE TotalTrials = ? AND TimePerGuess = ?",
+            (trials, time_per_guess),
+        ).fetchone()
+    previous_best = row[0] if row is not None else None
 
     if previous_best is None:
         return "New high score!"
@@ -120,11 +486,9 @@ def get_best_score(time_per_guess, trials, num_correct):
 
 def get_top_incorrect(top_n=None):
     base_query = (
-        "SELECT TargetString, TargetLowHigh, TargetNote, COUNT(*) AS total_incorrect "
-        "FROM score_log "
-        "WHERE IsCorrect = 0 "
-        "GROUP BY TargetString, TargetLowHigh, TargetNote "
-        "ORDER BY total_incorrect DESC"
+        "SELECT TargetString, TargetLowHigh, TargetNote, TotalIncorrect "
+        "FROM missed_notes "
+        "ORDER BY TotalIncorrect DESC"
     )
     params = ()
     if top_n is not None:
@@ -136,39 +500,12 @@ def get_top_incorrect(top_n=None):
         return cur.execute(base_query, params).fetchall()
 
 
-def create_incorrect_bar_chart(top_n=None):
-    # Build a chart-friendly view with an explicit empty-state figure.
-    incorrect_notes = get_top_incorrect(top_n)
-    fig, ax = plt.subplots(figsize=(16, 9))
-
-    if not incorrect_notes:
-        ax.text(0.5, 0.5, "No incorrect notes logged yet.", ha="center", va="center")
-        ax.set_axis_off()
-        return fig
-
-    incorrect_notes_dict = {
-        f"{x[0]} {x[1]} {x[2]}": int(x[3])
-        for x in incorrect_notes
-    }
-
-    notes = list(incorrect_notes_dict.keys())
-    values = list(incorrect_notes_dict.values())
-
-    ax.barh(notes, values, align="center")
-    ax.invert_yaxis()
-    ax.set_xticks(range(0, max(values) + 1))
-    plt.margins(y=0.01)
-    ax.set_xlabel("# incorrect")
-    ax.set_ylabel("Notes")
-    return fig
-
-
 def get_trial_time_combos():
     with _connect() as con:
         cur = con.cursor()
         return cur.execute(
-            "SELECT DISTINCT TotalTrials AS DT, TimePerGuess AS TPG "
-            "FROM final_score_log "
+            "SELECT TotalTrials AS DT, TimePerGuess AS TPG "
+            "FROM best_scores "
             "ORDER BY DT DESC, TPG ASC"
         ).fetchall()
 
@@ -177,12 +514,9 @@ def get_highscores(trials, time_per_guess):
     with _connect() as con:
         cur = con.cursor()
         return cur.execute(
-            "SELECT * FROM final_score_log "
+            "SELECT Date, GameID, TimePerGuess, TotalTrials, TotalCorrect FROM final_score_log "
             "WHERE TimePerGuess = ? AND TotalTrials = ? "
             "ORDER BY TotalCorrect DESC, GameID",
             (time_per_guess, trials),
         ).fetchall()
 
-
-if not DATABASE_PATH.exists():
-    create_database()
@@ -0,0 +1,130 @@
+import importlib.abc
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Record how long each module import and startup step takes.
+
+    install() puts a finder in front of sys.meta_path that times every module loaded from then
+    on (create_module + exec_module), and phase() times a named initialisation step. Nested
+    imports are attributed to their importer's total but not to its self time:
+
+        profiler = StartupProfiler()
+        profiler.install()
+        with profiler.phase("import qt_ui.app"):
+            import qt_ui.app
+        profiler.uninstall()
+        profiler.report()
+    """
+
+    REPORT_LIMIT = 25  # slowest imports listed by report()
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = {}  # module name -> [total seconds, self seconds]
+        self.phases = []  # (name, seconds), in order
+        self._stack = []  # child time accumulated by each open measurement
+        self._finder = None
+
+    def install(self):
+        if self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self):
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    @contextmanager
+    def _measure(self):
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        elapsed = [0.0, 0.0]
+        try:
+            yield elapsed
+        finally:
+            total = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += total
+            elapsed[0], elapsed[1] = total, total - children
+
+    @contextmanager
+    def import_of(self, name):
+        """Time one module load; used by the import hook."""
+        with self._measure() as elapsed:
+            yield
+        record = self.imports.setdefault(name, [0.0, 0.0])
+        record[0] += elapsed[0]
+        record[1] += elapsed[1]
+
+    @contextmanager
+    def phase(self, name):
+        """Time a named startup step, including the imports it triggers."""
+        with self._measure() as elapsed:
+            yield
+        self.phases.append((name, elapsed[0]))
+
+    def report(self, stream=None, limit=REPORT_LIMIT):
+        """Print the startup steps and the slowest imports (by self time) in milliseconds."""
+        stream = stream or sys.stderr
+        print(f"Startup profile: {(time.perf_counter() - self.started) * 1000:.1f} ms", file=stream)
+        for name, seconds in self.phases:
+            print(f"  {seconds * 1000:9.1f} ms  {name}", file=stream)
+
+        imports = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        own_time = sum(record[1] for record in self.imports.values())
+        print(f"{len(imports)} modules imported, {own_time * 1000:.1f} ms in total", file=stream)
+        print(f"  {'self':>9}     {'total':>9}     module", file=stream)
+        for name, (total, own) in imports[:limit]:
+            print(f"  {own * 1000:9.1f} ms  {total * 1000:9.1f} ms  {name}", file=stream)
+
+
+class _TimedLoader:
+    # Wraps a module's loader for the duration of its import; everything but the timed calls is
+    # passed through to the real loader.
+
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        with self._profiler.import_of(self._name):
+            return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        try:
+            with self._profiler.import_of(self._name):
+                self._loader.exec_module(module)
+        finally:
+            # Leave no trace of the wrapper on the imported module.
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    # Asks the finders behind it for the module spec and wraps the loader they return.
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self.profiler, fullname)
+        return spec
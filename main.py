@@ -1,8 +1,47 @@
-from qt_ui.app import MainWindow, build_app
+import sys
+from contextlib import ExitStack, nullcontext
 
+PROFILE_STARTUP_FLAG = "--profile-startup"
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    profiler = None
+    if PROFILE_STARTUP_FLAG in argv:
+        # Imported only in this mode, so a normal start does not pay for it.
+        from functions.startup_profiler import StartupProfiler
+
+        profiler = StartupProfiler()
+        profiler.install()
+
+    def phase(name):
+        return nullcontext() if profiler is None else profiler.phase(name)
+
+    with phase("import qt_ui.app"):
+        from PySide6.QtCore import QTimer
+        from qt_ui.app import MainWindow, build_app
+
+    with phase("build_app"):
+        app = build_app()
+    with phase("MainWindow"):
+        window = MainWindow()
+    with phase("show"):
+        window.show()
+
+    if profiler is not None:
+        # A zero-delay timer fires once the event loop has handled the pending show/paint events.
+        first_frame = ExitStack()
+        first_frame.enter_context(phase("event loop until the main menu is idle"))
+
+        def finish():
+            first_frame.close()
+            profiler.uninstall()
+            profiler.report()
+
+        QTimer.singleShot(0, finish)
 
-if __name__ == "__main__":
-    app = build_app()
-    window = MainWindow()
-    window.show()
     app.exec()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,12 @@
-import json
 import math
+import sys
 import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-import numpy as np
-import pyaudio
-from PySide6.QtCore import QThread, QTimer, Qt, Signal
-from PySide6.QtGui import QCloseEvent, QFont, QFontMetrics
+from PySide6.QtCore import QFileSystemWatcher, QObject, QRectF, QSize, QThread, QTimer, Qt, Signal
+from PySide6.QtGui import QCloseEvent, QColor, QFont, QFontMetrics, QPainter, QPen, QPixmap
 from PySide6.QtWidgets import (
     QApplication,
     QCheckBox,
@@ -17,11 +16,14 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QListWidget,
+    QListWidgetItem,
     QMainWindow,
     QMessageBox,
     QProgressBar,
     QPushButton,
     QScrollArea,
+    QSizePolicy,
     QSpinBox,
     QTableWidget,
     QTableWidgetItem,
@@ -34,64 +36,73 @@ from functions.calibration_settings import (
     load_calibration_settings,
     save_calibration_settings,
 )
-from functions.get_device_list import DeviceLister
-from functions.note_trainer import NoteTrainer
 from functions.sql_funcs import (
-    create_incorrect_bar_chart,
+    TrialWriter,
+    close_connection,
+    create_game,
     get_best_score,
-    get_current_game_id,
     get_highscores,
+    get_top_incorrect,
     get_trial_time_combos,
     insert_final_score,
-    insert_trial,
 )
-from tuner_utils.audio_analyser import AudioAnalyser
 from tuner_utils.settings import Settings
-from tuner_utils.threading_helper import ProtectedList
+
+# The audio stack (numpy, pyaudio, aubio) and matplotlib are imported by the windows that use
+# them, so the main menu comes up without loading them.
+if TYPE_CHECKING:
+    from tuner_utils.audio_source import AudioSource
 
 
 CHROMATIC_SHARPS = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
 FLAT_TO_SHARP = {"DB": "C#", "EB": "D#", "GB": "F#", "AB": "G#", "BB": "A#"}
 FRETBOARD_STRING_NOTES = ["E", "B", "G", "D", "A", "E"]  # Top to bottom (high E to low E)
-SCALE_LIBRARY_PATH = Path(__file__).with_name("scale_library.json")
-
-
-def load_scale_library():
-    """Load and validate the external scale catalog used by the preset UI."""
-    raw = json.loads(SCALE_LIBRARY_PATH.read_text(encoding="utf-8"))
-    default_keys = raw.get("default_keys")
-    scales = raw.get("scales")
-
-    if not isinstance(default_keys, list) or not default_keys:
-        raise RuntimeError(f"Invalid or missing default_keys in {SCALE_LIBRARY_PATH}")
-    if not isinstance(scales, dict) or not scales:
-        raise RuntimeError(f"Invalid or missing scales in {SCALE_LIBRARY_PATH}")
-
-    for scale_name, definition in scales.items():
-        intervals = definition.get("intervals")
-        degree_labels = definition.get("degree_labels")
-        if not isinstance(intervals, list) or not intervals:
-            raise RuntimeError(f"Scale '{scale_name}' has no intervals in {SCALE_LIBRARY_PATH}")
-        if not isinstance(degree_labels, list) or len(degree_labels) != len(intervals):
-            raise RuntimeError(
-                f"Scale '{scale_name}' has mismatched degree labels in {SCALE_LIBRARY_PATH}"
-            )
-        if intervals != sorted(intervals):
-            raise RuntimeError(f"Scale '{scale_name}' intervals must be sorted ascending")
-        if any(not isinstance(interval, int) or interval < 0 or interval > 11 for interval in intervals):
-            raise RuntimeError(f"Scale '{scale_name}' has invalid semitone values")
-        if len(set(intervals)) != len(intervals):
-            raise RuntimeError(f"Scale '{scale_name}' contains duplicate semitone values")
+SCALE_MATCH_LIMIT = 8  # suggestions listed by the custom scale window
+
+
+_scale_catalog = None
+_scale_index = None
+_scale_library_watcher = None
+
+
+def get_scale_catalog():
+    """Return the bundled and user scale libraries, loading them (or their snapshots) on first use."""
+    global _scale_catalog
+    if _scale_catalog is None:
+        from qt_ui.scale_library import ScaleCatalog
+
+        _scale_catalog = ScaleCatalog()
+        for path, message in _scale_catalog.errors.items():
+            print(f"Scale library {path.name} was not loaded: {message}")
+    return _scale_catalog
+
+
+def get_scale_definitions():
+    """Return the scale catalog definitions; the dict is updated in place when user files change."""
+    return get_scale_catalog().definitions
+
+
+def get_scale_index():
+    """Return the fretboard position index of every catalog scale in every key, built on first use."""
+    global _scale_index
+    if _scale_index is None:
+        from qt_ui.scale_index import ScaleIndex
 
-        keys = definition.get("keys", default_keys)
-        if not isinstance(keys, list) or not keys:
-            raise RuntimeError(f"Scale '{scale_name}' has invalid key options")
-        definition["keys"] = keys
+        _scale_index = ScaleIndex(get_scale_definitions(), open_string_pitch_classes())
+    return _scale_index
 
-    return default_keys, scales
 
+def get_scale_library_watcher():
+    """Return the watcher that applies edits of the user scale library files, started on first use."""
+    global _scale_library_watcher
+    if _scale_library_watcher is None:
+        _scale_library_watcher = ScaleLibraryWatcher(get_scale_catalog())
+    return _scale_library_watcher
 
-_DEFAULT_SCALE_KEYS, SCALE_DEFINITIONS = load_scale_library()
+
+def open_string_pitch_classes():
+    """Pitch classes (0 = C) of the open strings, in FRETBOARD_STRING_NOTES order."""
+    return [CHROMATIC_SHARPS.index(note) for note in FRETBOARD_STRING_NOTES]
 
 
 # Convert the selected device combo text into the numeric device index.
@@ -110,10 +121,26 @@ def normalise_note_name(note: str):
     return n if n in CHROMATIC_SHARPS else None
 
 
-def note_at_fret(open_note: str, fret: int):
-    """Return the note name at a given fret for a specific open string note."""
-    idx = CHROMATIC_SHARPS.index(open_note)
-    return CHROMATIC_SHARPS[(idx + fret) % 12]
+def parse_scale_notes(text: str):
+    """Split comma-separated note text into unique sharp-based names.
+
+    Returns (notes, invalid) where invalid is the first entry that is not a note, or None.
+    """
+    notes = []
+    for item in (part.strip() for part in text.split(",")):
+        if not item:
+            continue
+        n = normalise_note_name(item)
+        if n is None:
+            return notes, item
+        if n not in notes:
+            notes.append(n)
+    return notes, None
+
+
+def mask_note_names(mask: int):
+    """Sharp-based names of the pitch classes set in a 12-bit mask."""
+    return [note for pitch_class, note in enumerate(CHROMATIC_SHARPS) if mask >> pitch_class & 1]
 
 
 def build_scale_notes(root_note: str, intervals):
@@ -179,57 +206,64 @@ class NoteTrainerWorker(QThread):
 
     def run(self):
         """Execute the trial loop and persist per-trial/final score data."""
+        from functions.note_trainer import NoteTrainer
+
         trainer = NoteTrainer(
             self.input_device,
             input_rms_threshold=self.input_rms_threshold,
         )
         num_correct = 0
         trials_attempted = 0
-        game_id = get_current_game_id()
+        # Trial rows are batched and written off the trial path.
+        trial_writer = TrialWriter()
         try:
-            for i in range(self.total_trials):
-                if self.cancel_event.is_set():
-                    break
-
-                target = trainer.random_note()
-                self.trial_start.emit(
-                    target["string"],
-                    target["low_high"],
-                    target["note"],
-                    i + 1,
-                    self.total_trials,
-                )
-
-                result = trainer.play_game(
-                    self.time_per_guess,
-                    string=target["string"],
-                    low_high=target["low_high"],
-                    note=target["note"],
-                    stop_event=self.cancel_event,
-                    end_on_incorrect=self.end_on_incorrect,
-                    countdown_callback=self._emit_timer,
-                )
-                if result.get("cancelled"):
-                    break
-
-                is_correct = result["correct"] is True
-                if is_correct:
-                    num_correct += 1
-                trials_attempted += 1
-
-                insert_trial(
-                    game_id,
-                    self.time_per_guess,
-                    self.total_trials,
-                    i + 1,
-                    result["string"],
-                    result["low_high"],
-                    result["note"],
-                    result["played_note"],
-                    is_correct,
-                )
-                self.trial_result.emit(is_correct)
-
+            game_id = create_game(self.time_per_guess, self.total_trials, self.end_on_incorrect)
+            # One input stream and pitch detector for the whole session, not one per trial.
+            with trainer.session():
+                for i in range(self.total_trials):
+                    if self.cancel_event.is_set():
+                        break
+
+                    target = trainer.random_note()
+                    self.trial_start.emit(
+                        target["string"],
+                        target["low_high"],
+                        target["note"],
+                        i + 1,
+                        self.total_trials,
+                    )
+
+                    result = trainer.play_game(
+                        self.time_per_guess,
+                        string=target["string"],
+                        low_high=target["low_high"],
+                        note=target["note"],
+                        stop_event=self.cancel_event,
+                        end_on_incorrect=self.end_on_incorrect,
+                        countdown_callback=self._emit_timer,
+                    )
+                    if result.get("cancelled"):
+                        break
+
+                    is_correct = result["correct"] is True
+                    if is_correct:
+                        num_correct += 1
+                    trials_attempted += 1
+
+                    trial_writer.add_trial(
+                        game_id,
+                        self.time_per_guess,
+                        self.total_trials,
+                        i + 1,
+                        result["string"],
+                        result["low_high"],
+                        result["note"],
+                        result["played_note"],
+                        is_correct,
+                    )
+                    self.trial_result.emit(is_correct)
+
+            trial_writer.close()
             if trials_attempted > 0:
                 best = get_best_score(self.time_per_guess, trials_attempted, num_correct)
                 insert_final_score(game_id, self.time_per_guess, trials_attempted, num_correct)
@@ -239,6 +273,12 @@ class NoteTrainerWorker(QThread):
             self.game_complete.emit(num_correct, trials_attempted, best, self.cancel_event.is_set())
         except Exception as exc:
             self.game_error.emit(str(exc))
+        finally:
+            try:
+                trial_writer.close()
+            except Exception:
+                pass  # already reported through game_error
+            close_connection()
 
 
 class CalibrationWorker(QThread):
@@ -246,10 +286,14 @@ class CalibrationWorker(QThread):
     level_sample = Signal(float, bool)  # rms_value, input_detected
     worker_error = Signal(str)
 
-    def __init__(self, input_device: int, input_rms_threshold: float):
+    def __init__(self, input_device: int, input_rms_threshold: float, source: "AudioSource" = None):
+        import numpy as np
+        from tuner_utils.audio_hub import get_audio_hub
+
         super().__init__()
         self.input_device = input_device
         self.input_rms_threshold = max(0.0, float(input_rms_threshold))
+        self.source = source or get_audio_hub().subscribe(input_device, dtype=np.float32)
         self.stop_event = threading.Event()
 
     def update_threshold(self, input_rms_threshold: float):
@@ -259,29 +303,21 @@ class CalibrationWorker(QThread):
         self.stop_event.set()
 
     def run(self):
-        p = pyaudio.PyAudio()
-        stream = None
+        import numpy as np
+        from tuner_utils.audio_source import to_float32
+
         try:
-            stream = p.open(
-                format=pyaudio.paFloat32,
-                channels=1,
-                rate=44100,
-                input=True,
-                frames_per_buffer=1024,
-                input_device_index=self.input_device,
-            )
+            self.source.open()
             while not self.stop_event.is_set():
-                audiobuffer = stream.read(1024, exception_on_overflow=False)
-                signal = np.frombuffer(audiobuffer, dtype=np.float32)
-                rms = float(np.sqrt(np.mean(np.square(signal)))) if signal.size else 0.0
+                signal = to_float32(self.source.read(1024))
+                if not signal.size:
+                    break
+                rms = float(np.sqrt(np.mean(np.square(signal))))
                 self.level_sample.emit(rms, rms >= self.input_rms_threshold)
         except Exception as exc:
             self.worker_error.emit(str(exc))
         finally:
-            if stream is not None:
-                stream.stop_stream()
-                stream.close()
-            p.terminate()
+            self.source.close()
 
 
 class CalibrationWindow(QMainWindow):
@@ -401,31 +437,71 @@ class CalibrationWindow(QMainWindow):
         super().closeEvent(event)
 
 
+class TunerEstimateBridge(QObject):
+    """Carry "new estimate available" notifications from the analyser thread to the UI thread."""
+    estimate_ready = Signal()
+
+
 class TunerWindow(QMainWindow):
     """Live guitar tuner window backed by the audio analyser thread."""
     closed = Signal()
 
     def __init__(self, input_device: int):
-        """Initialise analyser state, build the UI and start polling updates."""
+        """Initialise analyser state, build the UI and start listening for pushed estimates."""
         super().__init__()
         self.setWindowTitle("Guitar Trainer: Tuner")
         self.resize(1080, 720)
 
-        self.frequency_queue = ProtectedList()
-        self.audio_analyser = AudioAnalyser(queue=self.frequency_queue, device_index=input_device)
-        self.audio_analyser.start()
-
         self.nearest_note_number_buffered = 69
         self.note_number_counter = 0
         self.a4_frequency = 440
         self.tone_hit_counter = 0
         self.in_tune_threshold_cents = 5.0
+        self._displayed = None  # (note, frequency, cents) currently on screen
 
         self._build_ui()
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.poll_frequency_queue)
-        self.timer.start(max(20, Settings.GUI_UPDATE_INTERVAL_MS))
+        # Updates are pushed by the analyser and coalesced to one repaint per display frame.
+        self._update_pending = False
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(self._frame_interval_ms())
+        self.refresh_timer.timeout.connect(self.refresh_tuning_display)
+        self.estimate_bridge = TunerEstimateBridge(self)
+        self.estimate_bridge.estimate_ready.connect(
+            self._schedule_refresh, Qt.ConnectionType.QueuedConnection
+        )
+
+        from tuner_utils.audio_analyser import AudioAnalyser
+        from tuner_utils.threading_helper import RingBuffer
+
+        self.frequency_queue = RingBuffer(capacity=64)
+        # Below the calibrated input level nothing is pushed, so an idle tuner does no UI work.
+        calibration = load_calibration_settings()
+        self.audio_analyser = AudioAnalyser(
+            queue=self.frequency_queue,
+            device_index=input_device,
+            on_estimate=self._on_estimate,
+            input_rms_threshold=calibration.get("input_rms_threshold", DEFAULT_INPUT_RMS_THRESHOLD),
+        )
+        self.audio_analyser.start()
+
+    def _frame_interval_ms(self) -> int:
+        screen = self.screen() or QApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        if not refresh_rate or refresh_rate <= 0:
+            refresh_rate = Settings.FPS
+        return max(1, int(round(1000.0 / refresh_rate)))
+
+    def _on_estimate(self, frequency: float):
+        # Analyser thread: signal the UI once per batch of estimates instead of once per estimate.
+        if not self._update_pending:
+            self._update_pending = True
+            self.estimate_bridge.estimate_ready.emit()
+
+    def _schedule_refresh(self):
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start()
 
     def _build_ui(self):
         # Main tuner layout: title + central card with live pitch readout and guidance.
@@ -491,9 +567,19 @@ class TunerWindow(QMainWindow):
 
         layout.addWidget(card, stretch=1)
 
-    def poll_frequency_queue(self):
-        # Pull latest detected frequency and update visual tuning state.
-        freq = self.frequency_queue.get()
+    @staticmethod
+    def _set_style_state(label: QLabel, object_name: str):
+        # Re-polishing is the expensive part of a stylesheet change, so only do it on a real change.
+        if label.objectName() == object_name:
+            return
+        label.setObjectName(object_name)
+        label.style().unpolish(label)
+        label.style().polish(label)
+
+    def refresh_tuning_display(self):
+        # Show the newest detected frequency; estimates that arrived within the same frame are skipped.
+        self._update_pending = False
+        freq = self.frequency_queue.latest()
         if freq is None:
             return
 
@@ -511,7 +597,13 @@ class TunerWindow(QMainWindow):
 
         diff_cents = (freq_difference / semitone_step) * 100 if semitone_step else 0
         display_cents = round(-diff_cents, 1)
-        self.note_label.setText(self.audio_analyser.number_to_note_name(self.nearest_note_number_buffered))
+        note_name = self.audio_analyser.number_to_note_name(self.nearest_note_number_buffered)
+        displayed = (note_name, round(freq, 1), display_cents)
+        if displayed == self._displayed:
+            return
+        self._displayed = displayed
+
+        self.note_label.setText(note_name)
         self.freq_label.setText(f"Detected frequency: {round(freq, 1)} Hz")
         self.cents_label.setText(f"{display_cents:+} cents")
         self.cents_bar.setValue(int(max(-50, min(50, display_cents))))
@@ -520,24 +612,23 @@ class TunerWindow(QMainWindow):
         is_sharp = display_cents > self.in_tune_threshold_cents
         is_flat = display_cents < -self.in_tune_threshold_cents
 
-        self.in_tune_label.setObjectName("inTuneOn" if in_tune else "inTuneOff")
-        self.tune_down_label.setObjectName("tuneHintActive" if is_sharp else "tuneHint")
-        self.tune_up_label.setObjectName("tuneHintActive" if is_flat else "tuneHint")
-
-        self.in_tune_label.style().unpolish(self.in_tune_label)
-        self.in_tune_label.style().polish(self.in_tune_label)
-        self.tune_down_label.style().unpolish(self.tune_down_label)
-        self.tune_down_label.style().polish(self.tune_down_label)
-        self.tune_up_label.style().unpolish(self.tune_up_label)
-        self.tune_up_label.style().polish(self.tune_up_label)
+        self._set_style_state(self.in_tune_label, "inTuneOn" if in_tune else "inTuneOff")
+        self._set_style_state(self.tune_down_label, "tuneHintActive" if is_sharp else "tuneHint")
+        self._set_style_state(self.tune_up_label, "tuneHintActive" if is_flat else "tuneHint")
 
     def closeEvent(self, event: QCloseEvent):
         """Stop timers/threads cleanly before the tuner window closes."""
-        if hasattr(self, "timer") and self.timer is not None:
-            self.timer.stop()
         if hasattr(self, "audio_analyser") and self.audio_analyser is not None:
+            self.audio_analyser.on_estimate = None
             self.audio_analyser.running = False
             self.audio_analyser.join()
+        if hasattr(self, "refresh_timer") and self.refresh_timer is not None:
+            self.refresh_timer.stop()
+        if self.frequency_queue.overflow_count:
+            print(
+                f"Tuner: analyser outran the UI {self.frequency_queue.overflow_count} time(s), "
+                f"{self.frequency_queue.drop_count} estimate(s) dropped."
+            )
         self.closed.emit()
         super().closeEvent(event)
 
@@ -637,20 +728,49 @@ class MissedNotesWindow(QMainWindow):
         controls.addStretch(1)
         layout.addLayout(controls)
 
-        self.figure = create_incorrect_bar_chart(10)
+        self._build_chart()
+        layout.addWidget(self.canvas, stretch=1)
+        self.replot()
+
+    def _build_chart(self):
+        # One figure, canvas and set of bars (one per possible top-N row) for the lifetime of
+        # the window; replot() only updates them. matplotlib is imported on first use, so it is
+        # not loaded at app start.
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=(16, 9))
+        self.ax = self.figure.add_subplot()
+        max_rows = self.top_n.maximum()
+        self.bars = list(self.ax.barh(range(max_rows), [0] * max_rows, align="center"))
+        self.ax.set_xlabel("# incorrect")
+        self.ax.set_ylabel("Notes")
+        self.empty_text = self.figure.text(
+            0.5, 0.5, "No incorrect notes logged yet.", ha="center", va="center", color="#d3dfeb"
+        )
         self._style_chart(self.figure)
         self.canvas = FigureCanvas(self.figure)
         self.canvas.setStyleSheet("background: transparent;")
-        layout.addWidget(self.canvas, stretch=1)
 
     def replot(self):
-        """Recreate and restyle the chart when the top-N value changes."""
-        self.canvas.setParent(None)
-        self.figure = create_incorrect_bar_chart(self.top_n.value())
-        self._style_chart(self.figure)
-        self.canvas = FigureCanvas(self.figure)
-        self.canvas.setStyleSheet("background: transparent;")
-        self.centralWidget().layout().addWidget(self.canvas, stretch=1)
+        """Update the bars in place when the top-N value changes."""
+        rows = get_top_incorrect(self.top_n.value())
+        has_rows = bool(rows)
+        self.ax.set_visible(has_rows)
+        self.empty_text.set_visible(not has_rows)
+        if has_rows:
+            values = [int(row[3]) for row in rows]
+            for index, bar in enumerate(self.bars):
+                bar.set_visible(index < len(rows))
+                if index < len(rows):
+                    bar.set_width(values[index])
+            self.ax.set_yticks(range(len(rows)), [f"{row[0]} {row[1]} {row[2]}" for row in rows])
+            # Most missed at the top, with a small margin around the first and last bar.
+            margin = 0.01 * len(rows)
+            self.ax.set_ylim(len(rows) - 0.6 + margin, -0.4 - margin)
+            self.ax.set_xlim(0, max(values) * 1.05)
+            self.ax.set_xticks(range(0, max(values) + 1))
+        self.canvas.draw_idle()
 
     def _style_chart(self, fig):
         # Restyle matplotlib output to match the app's dark palette.
@@ -975,140 +1095,255 @@ class NoteTrainerWindow(QMainWindow):
         self.closed.emit()
         super().closeEvent(event)
 
-class FretboardGrid(QFrame):
-    """Render a 6x12 fretboard grid showing either notes or scale degrees."""
-    def __init__(self, scale_notes, degree_by_note, display_mode: str, fret_count: int):
-        """Capture scale data and render the requested fretboard mode."""
+# Marker looks of the painted fretboard (scale note, scale root, open string outside the
+# scale): fill, border colour, border width, corner radius, text colour, font weight.
+FRET_MARKER_STYLES = {
+    "marker": (None, "#d17a23", 2, 17, "#f2f7ff", QFont.Weight.Bold),
+    "root": ("#2f4b86", None, 0, 6, "#f6fbff", QFont.Weight.ExtraBold),
+    "open": ("#8192b0", None, 0, 20, "#eef5ff", QFont.Weight.Bold),
+}
+FRET_GLYPH_CACHE_SIZE = 512
+_fret_glyph_cache = OrderedDict()
+
+
+def fret_marker_glyph(style: str, text: str, size: int, font_px: int, ratio: float) -> QPixmap:
+    """Return a rendered marker (shape + centred text), shared by every fretboard."""
+    key = (style, text, size, font_px, ratio)
+    glyph = _fret_glyph_cache.get(key)
+    if glyph is not None:
+        _fret_glyph_cache.move_to_end(key)
+        return glyph
+
+    fill, border, border_width, radius, text_color, weight = FRET_MARKER_STYLES[style]
+    glyph = QPixmap(max(1, round(size * ratio)), max(1, round(size * ratio)))
+    glyph.setDevicePixelRatio(ratio)
+    glyph.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(glyph)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    inset = border_width / 2
+    rect = QRectF(inset, inset, size - border_width, size - border_width)
+    radius = min(radius, rect.width() / 2)
+    painter.setPen(QPen(QColor(border), border_width) if border else Qt.PenStyle.NoPen)
+    painter.setBrush(QColor(fill) if fill else Qt.BrushStyle.NoBrush)
+    painter.drawRoundedRect(rect, radius, radius)
+    font = QFont("Segoe UI")
+    font.setPixelSize(font_px)
+    font.setWeight(weight)
+    painter.setFont(font)
+    painter.setPen(QColor(text_color))
+    painter.drawText(QRectF(0, 0, size, size), Qt.AlignmentFlag.AlignCenter, text)
+    painter.end()
+
+    _fret_glyph_cache[key] = glyph
+    if len(_fret_glyph_cache) > FRET_GLYPH_CACHE_SIZE:
+        _fret_glyph_cache.popitem(last=False)
+    return glyph
+
+
+class FretboardGrid(QWidget):
+    """Paint a 6-string fretboard showing either notes or scale degrees.
+
+    The board is one widget: the card, title, fret numbers and fret lines are rendered into a
+    background pixmap, and the markers into a second one composed from cached glyphs. Both are
+    rebuilt only when the size changes, so repaints just blit the two layers.
+    """
+    CARD_MARGIN = 14
+
+    def __init__(self, scale_notes, degree_labels, positions, display_mode: str, fret_count: int):
+        """Capture scale data and lay out the markers of the requested fretboard mode.
+
+        positions holds the degree index of every string/fret cell (see qt_ui.scale_index),
+        indexing scale_notes and degree_labels.
+        """
         super().__init__()
-        self.scale_notes = set(scale_notes)
-        self.degree_by_note = degree_by_note
+        self.scale_notes = list(scale_notes)
+        self.degree_labels = list(degree_labels)
+        self.positions = positions
         self.display_mode = display_mode  # "note" or "degree"
         self.fret_count = fret_count
-        self._top_fret_labels = []
-        self._bottom_fret_labels = []
-        self._open_markers = []
-        self._note_markers = []
-        self._fret_cells = []
-        self._build_ui()
-
-    def _build_ui(self):
-        """Build fretboard cells, open-string labels, and highlighted markers."""
-        self.setObjectName("fretboardCard")
-        layout = QGridLayout(self)
-        self.grid_layout = layout
-        layout.setContentsMargins(14, 14, 14, 14)
-        layout.setHorizontalSpacing(0)
-        layout.setVerticalSpacing(0)
-
-        title = QLabel("Note positions" if self.display_mode == "note" else "Scale degrees")
-        title.setObjectName("fretboardTitle")
-        self._grid_title = title
-        layout.addWidget(title, 0, 0, 1, self.fret_count + 1)
-
-        # Fret numbers row (1..N), with left-most column reserved for open strings.
-        for fret in range(1, self.fret_count + 1):
-            fret_label = QLabel(str(fret))
-            fret_label.setObjectName("fretNum")
-            fret_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(fret_label, 1, fret, 1, 1)
-            self._top_fret_labels.append(fret_label)
-
-        for row, open_note in enumerate(FRETBOARD_STRING_NOTES, start=2):
-            # Open-string marker at fret 0.
-            if open_note in self.scale_notes:
-                open_text = open_note if self.display_mode == "note" else self.degree_by_note[open_note]
-            else:
-                open_text = open_note
+        self.title = "Note positions" if display_mode == "note" else "Scale degrees"
+        self.markers = self._build_markers()
+        self._metrics = None
+        self._background = None
+        self._marker_layer = None
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.setMinimumWidth(14 * (fret_count + 1) + 2 * self.CARD_MARGIN)
+        self._update_metrics()
+
+    def _build_markers(self):
+        # (string row, fret, style, text) for every marker, fret 0 being the open string.
+        labels = self.scale_notes if self.display_mode == "note" else self.degree_labels
+        positions = self.positions[:, : self.fret_count + 1]
+        markers = [
+            (row, 0, "open", open_note)
+            for row, open_note in enumerate(FRETBOARD_STRING_NOTES)
+            if positions[row, 0] < 0
+        ]
+        rows, frets = (positions >= 0).nonzero()
+        for row, fret, degree in zip(rows.tolist(), frets.tolist(), positions[rows, frets].tolist()):
+            style = "root" if self.degree_labels[degree] == "1" else "marker"
+            markers.append((row, fret, style, labels[degree]))
+        return markers
+
+    def _update_metrics(self):
+        # Cell and font sizes for the current width; they shrink with the window, but never
+        # grow above the baseline.
+        cols = self.fret_count + 1
+        available_width = max(280, self.width() - 40)
+        cell_w = max(14, min(56, int(available_width / cols)))
+        cell_h = max(18, int(cell_w * 0.88))
+        reference_width = 1160 if self.fret_count == 24 else 680
+        shrink_scale = min(1.0, available_width / reference_width)
+        metrics = {
+            "cell_w": cell_w,
+            "cell_h": cell_h,
+            "label_h": max(9, int(cell_h * 0.62)),
+            "marker_size": max(8, min(cell_h - 4, cell_w - 4)),
+            "marker_font": max(8, int(16 * shrink_scale)),
+            "open_font": max(8, int(18 * shrink_scale)),
+            "fret_font": max(8, int(15 * shrink_scale)),
+            "title_font": max(14, int(28 * shrink_scale)),
+        }
+        if metrics == self._metrics:
+            return
+        title_font = QFont("Segoe UI")
+        title_font.setPixelSize(metrics["title_font"])
+        metrics["title_h"] = QFontMetrics(title_font).height() + 4
+        metrics["board_top"] = self.CARD_MARGIN + metrics["title_h"] + metrics["label_h"]
+        metrics["height"] = (
+            metrics["board_top"] + len(FRETBOARD_STRING_NOTES) * cell_h + metrics["label_h"] + 6 + self.CARD_MARGIN
+        )
+        height_changed = self._metrics is None or self._metrics["height"] != metrics["height"]
+        self._metrics = metrics
+        self._background = None
+        self._marker_layer = None
+        if height_changed:
+            self.updateGeometry()
 
-            open_marker = QLabel(open_text)
-            if open_note in self.scale_notes:
-                open_marker.setObjectName("fretMarkerRoot" if self.degree_by_note.get(open_note) == "1" else "fretMarker")
-            else:
-                open_marker.setObjectName("openString")
-            open_marker.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(open_marker, row, 0, 1, 1)
-            self._open_markers.append(open_marker)
-
-            for fret in range(1, self.fret_count + 1):
-                note = note_at_fret(open_note, fret)
-
-                cell = QFrame()
-                cell.setObjectName("fretCell")
-                cell_layout = QVBoxLayout(cell)
-                cell_layout.setContentsMargins(0, 0, 0, 0)
-                cell_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                self._fret_cells.append(cell)
-
-                if note in self.scale_notes:
-                    text = note if self.display_mode == "note" else self.degree_by_note[note]
-                    marker = QLabel(text)
-                    marker.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                    marker.setObjectName("fretMarkerRoot" if self.degree_by_note[note] == "1" else "fretMarker")
-                    cell_layout.addWidget(marker)
-                    self._note_markers.append(marker)
-
-                layout.addWidget(cell, row, fret, 1, 1)
-
-        # Duplicate fret numbers at the bottom for easier reading.
-        bottom_row = len(FRETBOARD_STRING_NOTES) + 2
-        for fret in range(1, self.fret_count + 1):
-            fret_label = QLabel(str(fret))
-            fret_label.setObjectName("fretNumBottom")
-            fret_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(fret_label, bottom_row, fret, 1, 1)
-            self._bottom_fret_labels.append(fret_label)
+    def sizeHint(self):
+        return QSize(self.width(), self._metrics["height"])
 
-        self._apply_responsive_sizes()
+    def minimumSizeHint(self):
+        return QSize(self.minimumWidth(), self._metrics["height"])
 
     def resizeEvent(self, event):
-        """Resize fretboard cells/markers to fit current window dimensions."""
-        self._apply_responsive_sizes()
+        """Recompute cell sizes for the new width; the layers are redrawn on the next paint."""
+        self._background = None
+        self._update_metrics()
         super().resizeEvent(event)
 
-    def _apply_responsive_sizes(self):
-        cols = self.fret_count + 1
-        available_width = max(280, self.width() - 40)
-        cell_w = max(14, min(56, int(available_width / cols)))
-        cell_h = max(18, int(cell_w * 0.88))
-        marker_size = max(8, min(cell_h - 4, cell_w - 4))
+    def _new_layer(self):
+        ratio = self.devicePixelRatioF()
+        layer = QPixmap(max(1, round(self.width() * ratio)), max(1, round(self.height() * ratio)))
+        layer.setDevicePixelRatio(ratio)
+        layer.fill(Qt.GlobalColor.transparent)
+        return layer
+
+    def _render_background(self):
+        m = self._metrics
+        layer = self._new_layer()
+        painter = QPainter(layer)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Card
+        painter.setPen(QPen(QColor("#2d3b4d"), 1))
+        painter.setBrush(QColor("#1b2430"))
+        painter.drawRoundedRect(QRectF(0.5, 0.5, self.width() - 1, self.height() - 1), 10, 10)
+
+        left = self.CARD_MARGIN
+        font = QFont("Segoe UI")
+        font.setPixelSize(m["title_font"])
+        font.setWeight(QFont.Weight.Bold)
+        painter.setFont(font)
+        painter.setPen(QColor("#dbe8f4"))
+        painter.drawText(
+            QRectF(left, self.CARD_MARGIN, self.width() - 2 * left, m["title_h"]),
+            Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+            self.title,
+        )
 
-        # Shrink fonts with width, but do not scale above baseline.
-        reference_width = 1160 if self.fret_count == 24 else 680
-        shrink_scale = min(1.0, available_width / reference_width)
-        marker_font = max(8, int(16 * shrink_scale))
-        fret_font = max(8, int(14 * shrink_scale))
-        title_font = max(14, int(28 * shrink_scale))
-
-        for lbl in self._top_fret_labels:
-            lbl.setFixedSize(cell_w, max(9, int(cell_h * 0.62)))
-            lbl.setFont(QFont("Segoe UI", fret_font, QFont.Weight.Medium))
-        for lbl in self._bottom_fret_labels:
-            lbl.setFixedSize(cell_w, max(9, int(cell_h * 0.62)))
-            lbl.setFont(QFont("Segoe UI", fret_font, QFont.Weight.Medium))
-        for cell in self._fret_cells:
-            cell.setFixedSize(cell_w, cell_h)
-        for marker in self._open_markers:
-            marker.setFixedSize(marker_size, marker_size)
-            marker.setFont(QFont("Segoe UI", marker_font, QFont.Weight.Bold))
-        for marker in self._note_markers:
-            marker.setFixedSize(marker_size, marker_size)
-            marker.setFont(QFont("Segoe UI", marker_font, QFont.Weight.Bold))
-
-        if hasattr(self, "_grid_title") and self._grid_title is not None:
-            self._grid_title.setFont(QFont("Segoe UI", title_font, QFont.Weight.DemiBold))
+        # Fret numbers above and below the strings, with the left-most column kept for open strings.
+        cell_w, cell_h, label_h = m["cell_w"], m["cell_h"], m["label_h"]
+        board_top = m["board_top"]
+        board_bottom = board_top + len(FRETBOARD_STRING_NOTES) * cell_h
+        font.setPixelSize(m["fret_font"])
+        font.setWeight(QFont.Weight.DemiBold)
+        painter.setFont(font)
+        painter.setPen(QColor("#9cb0c6"))
+        for fret in range(1, self.fret_count + 1):
+            x = left + fret * cell_w
+            painter.drawText(QRectF(x, board_top - label_h, cell_w, label_h), Qt.AlignmentFlag.AlignCenter, str(fret))
+            painter.drawText(QRectF(x, board_bottom + 6, cell_w, label_h), Qt.AlignmentFlag.AlignCenter, str(fret))
+
+        # Right and bottom edge of every fret cell.
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        painter.setPen(QPen(QColor("#41526a"), 1))
+        right = left + (self.fret_count + 1) * cell_w - 1
+        for string in range(1, len(FRETBOARD_STRING_NOTES) + 1):
+            y = board_top + string * cell_h - 1
+            painter.drawLine(left + cell_w, y, right, y)
+        for fret in range(1, self.fret_count + 1):
+            x = left + (fret + 1) * cell_w - 1
+            painter.drawLine(x, board_top, x, board_bottom - 1)
+        painter.end()
+        return layer
+
+    def _render_markers(self):
+        m = self._metrics
+        layer = self._new_layer()
+        ratio = layer.devicePixelRatio()
+        size = m["marker_size"]
+        inset_x = (m["cell_w"] - size) // 2
+        inset_y = (m["cell_h"] - size) // 2
+        painter = QPainter(layer)
+        for row, fret, style, text in self.markers:
+            font_px = m["open_font"] if style == "open" else m["marker_font"]
+            glyph = fret_marker_glyph(style, text, size, font_px, ratio)
+            x = self.CARD_MARGIN + fret * m["cell_w"] + inset_x
+            y = m["board_top"] + row * m["cell_h"] + inset_y
+            painter.drawPixmap(x, y, glyph)
+        painter.end()
+        return layer
+
+    def paintEvent(self, event):
+        """Blit the cached layers, rendering them first after a resize."""
+        if self._background is None or self._background.size() != self._new_layer_size():
+            self._background = self._render_background()
+            self._marker_layer = None
+        if self._marker_layer is None:
+            self._marker_layer = self._render_markers()
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._background)
+        painter.drawPixmap(0, 0, self._marker_layer)
+        painter.end()
+
+    def _new_layer_size(self):
+        ratio = self.devicePixelRatioF()
+        return QSize(max(1, round(self.width() * ratio)), max(1, round(self.height() * ratio)))
 
 
 class ScaleFretboardWindow(QMainWindow):
     """Show stacked fretboard diagrams for notes and corresponding degrees."""
     closed = Signal(str)
 
-    def __init__(self, scale_name: str, scale_notes, degree_labels, fret_count: int, display_mode: str):
-        """Create a titled fretboard window from a normalised note sequence."""
+    def __init__(
+        self, scale_name: str, scale_notes, degree_labels, fret_count: int, display_mode: str, positions=None
+    ):
+        """Create a titled fretboard window from a normalised note sequence.
+
+        positions: the scale's cell/degree array from the ScaleIndex; computed from scale_notes
+        when not given (custom scales).
+        """
         super().__init__()
         self.scale_name = scale_name
         self.scale_notes = scale_notes
         self.degree_labels = degree_labels
-        self.degree_by_note = {note: degree_labels[i] for i, note in enumerate(self.scale_notes)}
+        if positions is None:
+            from qt_ui.scale_index import fretboard_positions
+
+            pitch_classes = [CHROMATIC_SHARPS.index(note) for note in scale_notes]
+            positions = fretboard_positions(pitch_classes, open_string_pitch_classes(), fret_count)
+        self.positions = positions
         self.fret_count = fret_count
         self.display_mode = display_mode  # "Notes", "Degrees", "Note positions & Scale degrees"
         self.setWindowTitle(f"Scale Fretboard: {self.scale_name}")
@@ -1164,12 +1399,15 @@ class ScaleFretboardWindow(QMainWindow):
         meta_grid.setColumnStretch(len(self.scale_notes) + 1, 1)
         layout.addLayout(meta_grid)
 
-        notes_grid = FretboardGrid(self.scale_notes, self.degree_by_note, "note", self.fret_count)
-        degrees_grid = FretboardGrid(self.scale_notes, self.degree_by_note, "degree", self.fret_count)
+        # Only the fretboards that are shown are built.
         if self.display_mode in ("Notes", "Note positions & Scale degrees"):
-            layout.addWidget(notes_grid)
+            layout.addWidget(
+                FretboardGrid(self.scale_notes, self.degree_labels, self.positions, "note", self.fret_count)
+            )
         if self.display_mode in ("Degrees", "Note positions & Scale degrees"):
-            layout.addWidget(degrees_grid)
+            layout.addWidget(
+                FretboardGrid(self.scale_notes, self.degree_labels, self.positions, "degree", self.fret_count)
+            )
 
     def closeEvent(self, event: QCloseEvent):
         """Notify parent workbench when this fretboard window is closed."""
@@ -1178,14 +1416,26 @@ class ScaleFretboardWindow(QMainWindow):
 
 
 class CustomScaleWindow(QMainWindow):
-    """Allow manual entry of custom scales and opening diagram windows."""
-    def __init__(self):
+    """Allow manual entry of custom scales and opening diagram windows.
+
+    The entered notes are matched against the scale library as they change; with an input device
+    the notes can also be played in, and the matches follow along.
+    """
+    def __init__(self, input_device=None):
         """Initialise controls used to define and open custom scale fretboards."""
         super().__init__()
         self.setWindowTitle("Custom Scale Fretboard")
-        self.resize(760, 340)
+        self.resize(760, 520)
         self.fretboard_windows = []
+        self.input_device = input_device
+        self.audio_analyser = None
+        self.note_collector = None
+        self.listen_timer = QTimer(self)
+        self.listen_timer.setInterval(50)
+        self.listen_timer.timeout.connect(self.collect_played_notes)
         self._build_ui()
+        self.update_matches()
+        get_scale_library_watcher().scales_changed.connect(self.on_scales_changed)
 
     def _build_ui(self):
         """Build input form and launch action for custom fretboard windows."""
@@ -1200,8 +1450,8 @@ class CustomScaleWindow(QMainWindow):
         layout.addWidget(title)
 
         subtitle = QLabel(
-            "Enter a scale name, its notes, and an optional degree formula. "
-            "Each click opens a separate fretboard window."
+            "Enter a scale name, its notes, and an optional degree formula, or press Listen and "
+            "play the notes. Each click opens a separate fretboard window."
         )
         subtitle.setObjectName("muted")
         subtitle.setWordWrap(True)
@@ -1214,6 +1464,7 @@ class CustomScaleWindow(QMainWindow):
 
         form.addWidget(QLabel("Scale notes"), 1, 0)
         self.scale_notes_input = QLineEdit("A, B, C, D, E, F, G")
+        self.scale_notes_input.textChanged.connect(self.update_matches)
         form.addWidget(self.scale_notes_input, 1, 1)
 
         form.addWidget(QLabel("Degrees formula"), 2, 0)
@@ -1235,10 +1486,24 @@ class CustomScaleWindow(QMainWindow):
         form.addWidget(self.display_mode_input, 4, 1)
         layout.addLayout(form)
 
+        matches_title = QLabel("Matching scales (double-click to use)")
+        layout.addWidget(matches_title)
+        self.match_list = QListWidget()
+        self.match_list.itemActivated.connect(self.apply_match)
+        layout.addWidget(self.match_list, stretch=1)
+
         actions = QHBoxLayout()
         self.open_btn = QPushButton("Open Fretboard Window")
         self.open_btn.clicked.connect(self.open_fretboard_window)
         actions.addWidget(self.open_btn)
+
+        self.listen_btn = QPushButton("Listen")
+        self.listen_btn.setCheckable(True)
+        self.listen_btn.toggled.connect(self.set_listening)
+        if self.input_device is None:
+            self.listen_btn.setEnabled(False)
+            self.listen_btn.setToolTip("Select an input device in the main menu to play notes in.")
+        actions.addWidget(self.listen_btn)
         actions.addStretch(1)
         layout.addLayout(actions)
 
@@ -1246,24 +1511,107 @@ class CustomScaleWindow(QMainWindow):
         self.status.setObjectName("muted")
         layout.addWidget(self.status)
 
-    def open_fretboard_window(self):
-        """Parse/validate input notes and open a new independent fretboard view."""
-        raw_notes = [part.strip() for part in self.scale_notes_input.text().split(",") if part.strip()]
-        if not raw_notes:
-            self.status.setText("Enter at least one note.")
+    def update_matches(self):
+        """List the library scales closest to the entered notes, best first."""
+        self.match_list.clear()
+        notes, invalid = parse_scale_notes(self.scale_notes_input.text())
+        if invalid is not None or not notes:
             return
 
-        normalised = []
-        for item in raw_notes:
-            n = normalise_note_name(item)
-            if n is None:
-                self.status.setText(f"Invalid note: {item}")
-                return
-            if n not in normalised:
-                normalised.append(n)
+        pitch_classes = [CHROMATIC_SHARPS.index(note) for note in notes]
+        matches = get_scale_index().match(
+            pitch_classes, limit=SCALE_MATCH_LIMIT, preferred_root=pitch_classes[0]
+        )
+        for match in matches:
+            text = f"{CHROMATIC_SHARPS[match['root']]} {match['name']}  ({match['score']:.0%})"
+            differences = []
+            if match["missing"]:
+                differences.append(f"not in scale: {', '.join(mask_note_names(match['missing']))}")
+            if match["extra"]:
+                differences.append(f"also has: {', '.join(mask_note_names(match['extra']))}")
+            if differences:
+                text += "  -  " + "; ".join(differences)
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, (match["name"], match["root"]))
+            self.match_list.addItem(item)
+
+    def apply_match(self, item: QListWidgetItem):
+        """Fill the form with a suggested library scale."""
+        scale_name, root = item.data(Qt.ItemDataRole.UserRole)
+        definition = get_scale_definitions().get(scale_name)
+        if definition is None:
+            return
+        key_note = CHROMATIC_SHARPS[root]
+        self.scale_name_input.setText(f"{key_note} {scale_name}")
+        self.degree_input.setText(", ".join(definition["degree_labels"]))
+        self.scale_notes_input.setText(", ".join(build_scale_notes(key_note, definition["intervals"])))
+
+    def on_scales_changed(self, changed, removed):
+        """Re-rank the suggestions against the updated scale library."""
+        self.update_matches()
+
+    def set_listening(self, listening: bool):
+        """Start or stop adding played notes to the scale notes."""
+        if not listening:
+            self._stop_listening()
+            self.listen_btn.setText("Listen")
+            self.status.setText("Stopped listening.")
+            return
+
+        from qt_ui.scale_index import PitchClassCollector
+        from tuner_utils.audio_analyser import AudioAnalyser
+        from tuner_utils.threading_helper import RingBuffer
+
+        self.frequency_queue = RingBuffer(capacity=256)
+        self.note_collector = PitchClassCollector(hits=Settings.SCALE_FINDER_NOTE_HITS)
+        self.audio_analyser = AudioAnalyser(
+            queue=self.frequency_queue,
+            device_index=self.input_device,
+            detector=Settings.SCALE_FINDER_PITCH_DETECTOR,
+        )
+        self.audio_analyser.start()
+        self.listen_timer.start()
+
+        self.scale_name_input.setText("Played Scale")
+        self.scale_notes_input.clear()
+        self.degree_input.clear()
+        self.listen_btn.setText("Stop Listening")
+        self.status.setText("Listening... play each note of the scale, starting from the root.")
+
+    def collect_played_notes(self):
+        """Append notes that were held long enough since the last poll."""
+        if self.audio_analyser is not None and not self.audio_analyser.is_alive():
+            self.listen_btn.setChecked(False)
+            self.status.setText("The input device stopped; check the selected device.")
+            return
 
+        added = [
+            CHROMATIC_SHARPS[self.note_collector.pitch_classes[-1]]
+            for frequency in self.frequency_queue.get_all().tolist()
+            if self.note_collector.add(frequency)
+        ]
+        if not added:
+            return
+        notes, _ = parse_scale_notes(self.scale_notes_input.text())
+        notes += [note for note in added if note not in notes]
+        self.scale_notes_input.setText(", ".join(notes))
+        self.status.setText(f"Heard: {', '.join(added)}")
+
+    def _stop_listening(self):
+        self.listen_timer.stop()
+        if self.audio_analyser is not None:
+            self.audio_analyser.running = False
+            self.audio_analyser.join()
+            self.audio_analyser = None
+
+    def open_fretboard_window(self):
+        """Parse/validate input notes and open a new independent fretboard view."""
+        normalised, invalid = parse_scale_notes(self.scale_notes_input.text())
+        if invalid is not None:
+            self.status.setText(f"Invalid note: {invalid}")
+            return
         if not normalised:
-            self.status.setText("No valid notes were provided.")
+            self.status.setText("Enter at least one note.")
             return
 
         degree_raw = [part.strip() for part in self.degree_input.text().split(",") if part.strip()]
@@ -1292,19 +1640,102 @@ class CustomScaleWindow(QMainWindow):
         else:
             self.status.setText("")
 
+    def closeEvent(self, event: QCloseEvent):
+        """Stop listening before the window closes."""
+        self._stop_listening()
+        super().closeEvent(event)
+
+
+class ScaleLibraryWatcher(QObject):
+    """Watch the user scale library directory and apply edited files to the catalog and index.
+
+    Editors often save a file in several writes (or replace it), so changes are collected for a
+    short moment and then each touched file is reloaded once. Only its changed scales are
+    re-validated and re-indexed, and scales_changed tells open windows to refresh.
+    """
+    scales_changed = Signal(list, list)  # changed or added names, removed names
+    reload_failed = Signal(str)
+
+    RELOAD_DELAY_MS = 250
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.pending = set()
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(self.RELOAD_DELAY_MS)
+        self.reload_timer.timeout.connect(self.reload_pending)
+
+        try:
+            catalog.user_dir.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            pass
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        if catalog.user_dir.is_dir():
+            self.watcher.addPath(str(catalog.user_dir))
+        self._watch_files()
+
+    def _watch_files(self):
+        # A file replaced on save drops out of the watch list, so it is added back after reloads.
+        watched = set(self.watcher.files())
+        paths = [str(path) for path in self.catalog.user_files() if str(path) not in watched]
+        if paths:
+            self.watcher.addPaths(paths)
+
+    def on_directory_changed(self, directory: str):
+        # Files were added, removed or renamed: reload those that appeared or disappeared.
+        current = set(self.catalog.user_files())
+        known = {path for path in self.catalog.sources if path != self.catalog.bundled}
+        known |= set(self.catalog.errors)
+        self.pending |= current ^ known
+        self.reload_timer.start()
+
+    def on_file_changed(self, path: str):
+        self.pending.add(Path(path))
+        self.reload_timer.start()
+
+    def reload_pending(self):
+        # Taken up front, so a file that fails to load is not retried until it changes again.
+        pending, self.pending = sorted(self.pending), set()
+        changed, removed = {}, []
+        for path in pending:
+            try:
+                file_changed, file_removed = self.catalog.reload(path)
+            except RuntimeError as e:
+                self.reload_failed.emit(f"{path.name}: {e}")
+                continue
+            for name in file_removed:
+                changed.pop(name, None)
+            removed = [name for name in removed if name not in file_changed] + file_removed
+            changed.update(file_changed)
+        self._watch_files()
+
+        if changed or removed:
+            if _scale_index is not None:
+                _scale_index.update(changed, removed)
+            self.scales_changed.emit(list(changed), removed)
+
 
 class ScaleWorkbenchWindow(QMainWindow):
     """Preset scale picker backed by Berklee-style scale definitions."""
-    def __init__(self):
+    def __init__(self, input_device=None):
         """Initialise controls for preset scales and the custom-scale launcher."""
         super().__init__()
         self.setWindowTitle("Scale Notation to Fretboard (PoC)")
         self.resize(820, 320)
+        self.input_device = input_device
         self.fretboard_windows = []
         self.custom_scale_window = None
         self._build_ui()
         self.on_scale_changed(self.scale_input.currentText())
 
+        watcher = get_scale_library_watcher()
+        watcher.scales_changed.connect(self.on_scales_changed)
+        watcher.reload_failed.connect(self.on_scale_reload_failed)
+
     def _build_ui(self):
         """Build the preset picker, launch actions, and display options."""
         root = QWidget()
@@ -1319,7 +1750,8 @@ class ScaleWorkbenchWindow(QMainWindow):
 
         subtitle = QLabel(
             "Choose a key and scale from the preset library, or open the custom scale window "
-            "for manual note and interval entry."
+            "for manual note and interval entry. Scale library files added to "
+            f"{get_scale_catalog().user_dir} are picked up while the app runs."
         )
         subtitle.setObjectName("muted")
         subtitle.setWordWrap(True)
@@ -1334,7 +1766,7 @@ class ScaleWorkbenchWindow(QMainWindow):
 
         picker_layout.addWidget(QLabel("Scale"), 0, 2)
         self.scale_input = QComboBox()
-        self.scale_input.addItems(list(SCALE_DEFINITIONS.keys()))
+        self.scale_input.addItems(list(get_scale_definitions().keys()))
         self.scale_input.setCurrentText("Natural Minor")
         self.scale_input.currentTextChanged.connect(self.on_scale_changed)
         picker_layout.addWidget(self.scale_input, 0, 3)
@@ -1378,7 +1810,7 @@ class ScaleWorkbenchWindow(QMainWindow):
 
     def on_scale_changed(self, scale_name: str):
         """Refresh the available keys when the selected scale changes."""
-        definition = SCALE_DEFINITIONS.get(scale_name)
+        definition = get_scale_definitions().get(scale_name)
         if definition is None:
             self.key_note_input.clear()
             return
@@ -1402,11 +1834,37 @@ class ScaleWorkbenchWindow(QMainWindow):
             meta_parts.append(f"Aliases: {', '.join(aliases)}")
         self.scale_meta.setText(" | ".join(meta_parts))
 
+    def on_scales_changed(self, changed, removed):
+        """Bring the scale picker in line with an edited user scale library."""
+        definitions = get_scale_definitions()
+        self.scale_input.blockSignals(True)
+        for scale_name in removed:
+            row = self.scale_input.findText(scale_name, Qt.MatchFlag.MatchExactly)
+            if row >= 0:
+                self.scale_input.removeItem(row)
+        for scale_name in changed:
+            if self.scale_input.findText(scale_name, Qt.MatchFlag.MatchExactly) < 0:
+                self.scale_input.addItem(scale_name)
+        self.scale_input.blockSignals(False)
+        # The selected scale may have been edited or removed, so its keys are always refreshed.
+        self.on_scale_changed(self.scale_input.currentText())
+
+        parts = []
+        if changed:
+            parts.append(f"{len(changed)} updated")
+        if removed:
+            parts.append(f"{len(removed)} removed")
+        self.status.setText(f"Scale library reloaded: {', '.join(parts)} ({len(definitions)} scales).")
+
+    def on_scale_reload_failed(self, message: str):
+        """Show why an edited scale library file was not applied."""
+        self.status.setText(f"Scale library not reloaded: {message}")
+
     def open_fretboard_window(self):
         """Open a fretboard window for the currently selected preset scale."""
         scale_name = self.scale_input.currentText().strip()
         key_note = self.key_note_input.currentText().strip()
-        definition = SCALE_DEFINITIONS.get(scale_name)
+        definition = get_scale_definitions().get(scale_name)
         if not key_note or definition is None:
             self.status.setText("Choose a valid key and scale.")
             return
@@ -1418,6 +1876,7 @@ class ScaleWorkbenchWindow(QMainWindow):
 
         display_mode = resolve_display_mode(self.display_mode_input.currentText())
         fret_count = int(self.fret_count_input.currentText())
+        root = CHROMATIC_SHARPS.index(normalise_note_name(key_note))
         window_title = f"{key_note} {scale_name}"
         window = ScaleFretboardWindow(
             window_title,
@@ -1425,6 +1884,7 @@ class ScaleWorkbenchWindow(QMainWindow):
             definition["degree_labels"],
             fret_count,
             display_mode,
+            positions=get_scale_index().positions_for(scale_name, root, fret_count),
         )
         window.closed.connect(self.on_fretboard_closed)
         window.show()
@@ -1438,7 +1898,7 @@ class ScaleWorkbenchWindow(QMainWindow):
             self.custom_scale_window.activateWindow()
             return
 
-        self.custom_scale_window = CustomScaleWindow()
+        self.custom_scale_window = CustomScaleWindow(self.input_device)
         self.custom_scale_window.show()
 
     def on_fretboard_closed(self, scale_name: str):
@@ -1461,13 +1921,16 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Guitar Trainer")
         self.resize(1080, 720)
         self.setMinimumSize(940, 620)
-        self.device_lister = DeviceLister()
+        self.device_lister = None
         self.tuner_window = None
         self.note_window = None
         self.scale_window = None
         self.calibration_window = None
         self._build_ui()
-        self.refresh_devices()
+        # Scanning devices loads pyaudio and PortAudio; do it once the menu is on screen.
+        for button in (self.use_btn, self.tuner_btn, self.trainer_btn, self.calibrate_btn):
+            button.setEnabled(False)
+        QTimer.singleShot(0, self.refresh_devices)
 
     def _build_ui(self):
         # Main landing page with audio-device selection and mode launch buttons.
@@ -1542,6 +2005,10 @@ class MainWindow(QMainWindow):
 
     def refresh_devices(self):
         """Reload available audio input devices and update control availability."""
+        if self.device_lister is None:
+            from functions.get_device_list import DeviceLister
+
+            self.device_lister = DeviceLister()
         devices = self.device_lister.show_devices("input")
         self.device_combo.clear()
         self.device_combo.addItems(devices)
@@ -1606,7 +2073,12 @@ class MainWindow(QMainWindow):
 
     def open_scale_mapper(self):
         """Open the scale-to-fretboard PoC workbench window."""
-        self.scale_window = ScaleWorkbenchWindow()
+        try:
+            did = self.selected_device_id()
+        except ValueError:
+            # The scale tools work without audio; only playing notes into them needs a device.
+            did = None
+        self.scale_window = ScaleWorkbenchWindow(did)
         self.scale_window.show()
 
     def open_input_calibration(self):
@@ -1630,6 +2102,13 @@ class MainWindow(QMainWindow):
     def on_calibration_saved(self, threshold_rms: float):
         self.status.setText(f"Calibration saved: {rms_to_db(threshold_rms):.1f} dBFS.")
 
+    def closeEvent(self, event: QCloseEvent):
+        """Close the shared capture streams when the app's main window goes away."""
+        audio_hub = sys.modules.get("tuner_utils.audio_hub")
+        if audio_hub is not None:  # otherwise no stream was ever opened
+            audio_hub.get_audio_hub().shutdown()
+        super().closeEvent(event)
+
 
 def build_app() -> QApplication:
     # Global application theme. Update these style blocks to tune colors, typography, and control styling.
@@ -1711,30 +2190,6 @@ def build_app() -> QApplication:
             font-size: 18px;
             font-weight: 600;
         }
-        QLabel#fretboardTitle {
-            font-size: 28px;
-            font-weight: 700;
-            color: #dbe8f4;
-            padding-bottom: 4px;
-        }
-        QLabel#fretNum {
-            color: #9cb0c6;
-            font-size: 15px;
-            font-weight: 600;
-        }
-        QLabel#fretNumBottom {
-            color: #9cb0c6;
-            font-size: 15px;
-            font-weight: 600;
-            padding-top: 6px;
-        }
-        QLabel#openString {
-            border-radius: 20px;
-            background: #8192b0;
-            color: #eef5ff;
-            font-size: 18px;
-            font-weight: 700;
-        }
         QLabel#openStringInScale {
             min-width: 40px;
             max-width: 40px;
@@ -1757,31 +2212,6 @@ def build_app() -> QApplication:
             font-size: 18px;
             font-weight: 800;
         }
-        QFrame#fretboardCard {
-            background: #1b2430;
-            border: 1px solid #2d3b4d;
-            border-radius: 10px;
-        }
-        QFrame#fretCell {
-            border-right: 1px solid #41526a;
-            border-bottom: 1px solid #41526a;
-            background: transparent;
-        }
-        QLabel#fretMarker {
-            border-radius: 17px;
-            background: transparent;
-            border: 2px solid #d17a23;
-            color: #f2f7ff;
-            font-size: 16px;
-            font-weight: 700;
-        }
-        QLabel#fretMarkerRoot {
-            border-radius: 6px;
-            background: #2f4b86;
-            color: #f6fbff;
-            font-size: 16px;
-            font-weight: 800;
-        }
         QLabel#tuneHint {
             color: #8b9db0;
             font-size: 15px;
@@ -0,0 +1,202 @@
+import numpy as np
+
+PITCH_CLASSES = 12
+PITCH_CLASS_MASK = (1 << PITCH_CLASSES) - 1
+NO_DEGREE = -1
+DEFAULT_MAX_FRETS = 24
+# Number of set bits of every 12-bit mask.
+POPCOUNT = np.array([bin(mask).count("1") for mask in range(1 << PITCH_CLASSES)], dtype=np.uint8)
+
+
+def pitch_class_mask(pitch_classes) -> int:
+    """12-bit mask with bit n set for every pitch class n (0 = C) in pitch_classes."""
+    mask = 0
+    for pitch_class in pitch_classes:
+        mask |= 1 << (int(pitch_class) % PITCH_CLASSES)
+    return mask
+
+
+def transpose_mask(mask: int, semitones: int) -> int:
+    """Rotate a pitch-class mask up by semitones."""
+    semitones %= PITCH_CLASSES
+    return ((mask << semitones) | (mask >> (PITCH_CLASSES - semitones))) & PITCH_CLASS_MASK
+
+
+def cell_pitch_classes(open_pitch_classes, max_frets=DEFAULT_MAX_FRETS):
+    """(strings, max_frets + 1) array with the pitch class of every string/fret cell."""
+    frets = np.arange(max_frets + 1)
+    return (np.asarray(open_pitch_classes, dtype=np.int16)[:, None] + frets) % PITCH_CLASSES
+
+
+def fretboard_positions(scale_pitch_classes, open_pitch_classes, max_frets=DEFAULT_MAX_FRETS):
+    """Degree index of every cell for an ordered list of scale pitch classes (NO_DEGREE if the
+    cell is not in the scale), for scales that are not part of a ScaleIndex."""
+    degree_by_pitch_class = np.full(PITCH_CLASSES, NO_DEGREE, dtype=np.int16)
+    for degree, pitch_class in enumerate(scale_pitch_classes):
+        degree_by_pitch_class[pitch_class % PITCH_CLASSES] = degree
+    return degree_by_pitch_class[cell_pitch_classes(open_pitch_classes, max_frets)]
+
+
+class ScaleIndex:
+    """Every fretboard position of every scale in every key, computed once and then updated
+    per scale (update()) when the catalog changes.
+
+    For S scales (in the order of `definitions`), 12 roots and the given open strings:
+
+        positions[s, root, string, fret]  degree index of the cell in the scale, NO_DEGREE if absent
+        masks[s, root]                    12-bit pitch-class mask of the scale in that key
+
+    so opening a fretboard is one array lookup, and reverse queries ("which scales contain these
+    notes") are a single vectorised comparison over all S x 12 masks:
+
+        index = ScaleIndex(get_scale_definitions(), open_pitch_classes=[4, 11, 7, 2, 9, 4])
+        degrees = index.positions_for("Natural Minor", 9)   # A natural minor, 6 x 25
+        index.scales_containing([0, 4, 7])                  # [("Major", 0), ("Major", 5), ...]
+        index.match([9, 11, 0, 2, 4, 5, 7], preferred_root=9)  # ranked, best first
+    """
+
+    def __init__(self, definitions, open_pitch_classes, max_frets=DEFAULT_MAX_FRETS):
+        self.max_frets = max_frets
+        self.cell_pitch = cell_pitch_classes(open_pitch_classes, max_frets)
+        # Interval of every cell above each root: (12, strings, frets + 1).
+        roots = np.arange(PITCH_CLASSES)
+        self.interval_of_cell = (self.cell_pitch[None, :, :] - roots[:, None, None]) % PITCH_CLASSES
+
+        self.names = []
+        self.row_by_name = {}
+        self.degree_by_interval = np.empty((0, PITCH_CLASSES), dtype=np.int16)
+        self.positions = np.empty((0,) + self.interval_of_cell.shape, dtype=np.int16)
+        self.masks = np.empty((0, PITCH_CLASSES), dtype=np.uint16)
+        self.update(definitions)
+
+    def _index_scales(self, definitions):
+        # degree_by_interval, positions and masks rows for a list of scale definitions.
+        degree_by_interval = np.full((len(definitions), PITCH_CLASSES), NO_DEGREE, dtype=np.int16)
+        for row, definition in enumerate(definitions):
+            intervals = definition["intervals"]
+            degree_by_interval[row, intervals] = np.arange(len(intervals))
+        positions = degree_by_interval[:, self.interval_of_cell]
+
+        root_masks = [pitch_class_mask(definition["intervals"]) for definition in definitions]
+        masks = np.array(
+            [[transpose_mask(mask, root) for root in range(PITCH_CLASSES)] for mask in root_masks],
+            dtype=np.uint16,
+        ).reshape(len(definitions), PITCH_CLASSES)
+        return degree_by_interval, positions, masks
+
+    def update(self, changed, removed=()):
+        """Re-index only the given scales: changed maps names to new or edited definitions, and
+        removed names are dropped. Rows of all other scales are left as they are; new scales are
+        appended."""
+        removed = {name for name in removed if name in self.row_by_name}
+        if removed:
+            keep = [row for row, name in enumerate(self.names) if name not in removed]
+            self.names = [self.names[row] for row in keep]
+            self.degree_by_interval = self.degree_by_interval[keep]
+            self.positions = self.positions[keep]
+            self.masks = self.masks[keep]
+            self.row_by_name = {name: row for row, name in enumerate(self.names)}
+        if not changed:
+            return
+
+        names = list(changed)
+        degree_by_interval, positions, masks = self._index_scales([changed[name] for name in names])
+        edited = [(new_row, self.row_by_name[name]) for new_row, name in enumerate(names) if name in self.row_by_name]
+        if edited:
+            new_rows, rows = zip(*edited)
+            self.degree_by_interval[list(rows)] = degree_by_interval[list(new_rows)]
+            self.positions[list(rows)] = positions[list(new_rows)]
+            self.masks[list(rows)] = masks[list(new_rows)]
+
+        added = [new_row for new_row, name in enumerate(names) if name not in self.row_by_name]
+        if added:
+            self.degree_by_interval = np.concatenate((self.degree_by_interval, degree_by_interval[added]))
+            self.positions = np.concatenate((self.positions, positions[added]))
+            self.masks = np.concatenate((self.masks, masks[added]))
+            for new_row in added:
+                self.row_by_name[names[new_row]] = len(self.names)
+                self.names.append(names[new_row])
+
+    def __len__(self):
+        return len(self.names)
+
+    def positions_for(self, name: str, root: int, fret_count=None):
+        """Degree index of every cell (strings x frets 0..fret_count) of a scale in one key."""
+        positions = self.positions[self.row_by_name[name], root % PITCH_CLASSES]
+        return positions if fret_count is None else positions[:, : fret_count + 1]
+
+    def scales_containing(self, pitch_classes):
+        """Every (scale name, root) that contains all of the given pitch classes."""
+        query = pitch_class_mask(pitch_classes)
+        rows, roots = np.nonzero((self.masks & query) == query)
+        return [(self.names[row], int(root)) for row, root in zip(rows, roots)]
+
+    def match(self, pitch_classes, limit=10, preferred_root=None):
+        """Rank every scale in every key against a set of pitch classes, best first.
+
+        The score is the Jaccard index |notes & scale| / |notes | scale| of the two masks, so a
+        scale scores 1.0 only if it has exactly the given notes. Ties go to preferred_root (e.g.
+        the first note entered), then to the scale sharing more notes, then to catalog order.
+        Returns up to `limit` dicts with name, root, score, missing (given notes outside the
+        scale) and extra (scale notes not given) as pitch-class masks.
+        """
+        query = pitch_class_mask(pitch_classes)
+        if not query or not len(self.names):
+            return []
+        shared = POPCOUNT[self.masks & query].ravel()
+        union = POPCOUNT[self.masks | query].ravel()
+        score = shared / union
+        prefer = np.zeros(score.shape, dtype=bool)
+        if preferred_root is not None:
+            prefer.reshape(self.masks.shape)[:, preferred_root % PITCH_CLASSES] = True
+
+        # lexsort sorts by its last key first; flat positions keep catalog order among equals.
+        order = np.lexsort((np.arange(score.size), -shared.astype(np.int16), ~prefer, -score))[:limit]
+        matches = []
+        for flat in order.tolist():
+            row, root = divmod(flat, PITCH_CLASSES)
+            mask = int(self.masks[row, root])
+            matches.append(
+                {
+                    "name": self.names[row],
+                    "root": root,
+                    "score": float(score[flat]),
+                    "missing": query & ~mask,
+                    "extra": mask & ~query,
+                }
+            )
+        return matches
+
+
+class PitchClassCollector:
+    """Turn a stream of frequency estimates into the set of pitch classes that were played.
+
+    A pitch class counts once `hits` consecutive estimates round to the same note, which keeps
+    attack transients and octave slips out. pitch_classes lists them in the order first heard.
+    """
+
+    def __init__(self, hits=3, a4_frequency=440.0):
+        self.hits = hits
+        self.a4_frequency = a4_frequency
+        self.pitch_classes = []
+        self._note = None
+        self._count = 0
+
+    def add(self, frequency: float) -> bool:
+        """Feed one estimate in Hz; returns True when it completed a new pitch class."""
+        if not frequency or frequency <= 0:
+            return False
+        note = int(round(12 * np.log2(frequency / self.a4_frequency) + 69))
+        if note != self._note:
+            self._note, self._count = note, 0
+        self._count += 1
+        pitch_class = note % PITCH_CLASSES
+        if self._count == self.hits and pitch_class not in self.pitch_classes:
+            self.pitch_classes.append(pitch_class)
+            return True
+        return False
+
+    def clear(self):
+        self.pitch_classes = []
+        self._note = None
+        self._count = 0
@@ -0,0 +1,327 @@
+import hashlib
+import json
+import marshal
+import os
+from pathlib import Path
+
+from functions.calibration_settings import SETTINGS_DIR
+
+SCALE_LIBRARY_PATH = Path(__file__).with_name("scale_library.json")
+USER_LIBRARY_DIR = SETTINGS_DIR / "scales"  # *.json files in the bundled library's format
+SNAPSHOT_DIR = SETTINGS_DIR / "cache"
+# Fields compared to tell whether a reloaded entry changed; empty and missing count as equal.
+DEFINITION_FIELDS = ("category", "aliases", "intervals", "degree_labels", "keys")
+# Bump when the snapshot layout or the validation rules change, so older snapshots are recompiled.
+SNAPSHOT_FORMAT = 3
+
+
+def validate_scale_definition(scale_name, definition, default_keys, source=SCALE_LIBRARY_PATH):
+    """Check one catalog entry; fills in definition["keys"] from default_keys if it has none."""
+    intervals = definition.get("intervals")
+    degree_labels = definition.get("degree_labels")
+    if not isinstance(intervals, list) or not intervals:
+        raise RuntimeError(f"Scale '{scale_name}' has no intervals in {source}")
+    if not isinstance(degree_labels, list) or len(degree_labels) != len(intervals):
+        raise RuntimeError(f"Scale '{scale_name}' has mismatched degree labels in {source}")
+    if any(not isinstance(label, str) for label in degree_labels):
+        raise RuntimeError(f"Scale '{scale_name}' degree labels must be strings in {source}")
+    # Types first: sorting mixed values raises TypeError instead of reporting the entry.
+    if any(
+        not isinstance(interval, int) or isinstance(interval, bool) or interval < 0 or interval > 11
+        for interval in intervals
+    ):
+        raise RuntimeError(f"Scale '{scale_name}' has invalid semitone values")
+    if intervals != sorted(intervals):
+        raise RuntimeError(f"Scale '{scale_name}' intervals must be sorted ascending")
+    if len(set(intervals)) != len(intervals):
+        raise RuntimeError(f"Scale '{scale_name}' contains duplicate semitone values")
+
+    category = definition.get("category")
+    if category is not None and not isinstance(category, str):
+        raise RuntimeError(f"Scale '{scale_name}' category must be a string in {source}")
+    aliases = definition.get("aliases")
+    if aliases is not None and (not isinstance(aliases, list) or any(not isinstance(a, str) for a in aliases)):
+        raise RuntimeError(f"Scale '{scale_name}' aliases must be a list of strings in {source}")
+
+    keys = definition.get("keys", default_keys)
+    if not isinstance(keys, list) or not keys or any(not isinstance(key, str) for key in keys):
+        raise RuntimeError(f"Scale '{scale_name}' has invalid key options")
+    definition["keys"] = keys
+
+
+def check_scale_library(raw, source=SCALE_LIBRARY_PATH, default_keys=None):
+    """Check the layout of a parsed catalog file (but not its entries); returns (default_keys, scales).
+
+    default_keys is used if the file has none (user libraries fall back to the bundled keys).
+    """
+    if not isinstance(raw, dict):
+        raise RuntimeError(f"Invalid scale library {source}")
+    default_keys = raw.get("default_keys", default_keys)
+    scales = raw.get("scales")
+
+    if not isinstance(default_keys, list) or not default_keys:
+        raise RuntimeError(f"Invalid or missing default_keys in {source}")
+    if not isinstance(scales, dict) or not scales:
+        raise RuntimeError(f"Invalid or missing scales in {source}")
+    for scale_name, definition in scales.items():
+        if not isinstance(definition, dict):
+            raise RuntimeError(f"Scale '{scale_name}' is not an object in {source}")
+    return default_keys, scales
+
+
+def validate_scale_library(raw, source=SCALE_LIBRARY_PATH, default_keys=None):
+    """Check a parsed catalog file and all of its entries; returns (default_keys, scales)."""
+    default_keys, scales = check_scale_library(raw, source, default_keys)
+    for scale_name, definition in scales.items():
+        validate_scale_definition(scale_name, definition, default_keys, source)
+    return default_keys, scales
+
+
+def compile_scale_library(default_keys, scales):
+    """Pack a validated catalog into the plain tuples stored in a snapshot.
+
+    Intervals become 12-bit masks (they are sorted and unique, so the mask is lossless), and
+    degree labels, key lists, categories and aliases are stored once in string/list tables and
+    referenced by index, so a large library of similar scales stays small and loads fast.
+    """
+    strings, string_ids = [], {}
+    key_lists, key_list_ids = [], {}
+
+    def intern(text):
+        if text not in string_ids:
+            string_ids[text] = len(strings)
+            strings.append(text)
+        return string_ids[text]
+
+    def intern_keys(keys):
+        keys = tuple(keys)
+        if keys not in key_list_ids:
+            key_list_ids[keys] = len(key_lists)
+            key_lists.append(tuple(intern(key) for key in keys))
+        return key_list_ids[keys]
+
+    # Interned first: the key list tables are complete only once every entry has been packed.
+    default_keys_id = intern_keys(default_keys)
+    entries = []
+    for scale_name, definition in scales.items():
+        mask = 0
+        for interval in definition["intervals"]:
+            mask |= 1 << interval
+        entries.append(
+            (
+                intern(scale_name),
+                mask,
+                tuple(intern(label) for label in definition["degree_labels"]),
+                intern_keys(definition["keys"]),
+                intern(definition["category"]) if definition.get("category") else -1,
+                tuple(intern(alias) for alias in definition.get("aliases") or ()),
+            )
+        )
+    return (tuple(strings), tuple(key_lists), default_keys_id, tuple(entries))
+
+
+def expand_scale_library(snapshot):
+    """Rebuild (default_keys, scales) in the validated catalog format from a compiled snapshot."""
+    strings, key_lists, default_keys_id, entries = snapshot
+    keys_by_id = [[strings[key] for key in keys] for keys in key_lists]
+    intervals_by_mask = {}
+    scales = {}
+    for name_id, mask, label_ids, keys_id, category_id, alias_ids in entries:
+        intervals = intervals_by_mask.get(mask)
+        if intervals is None:
+            intervals = intervals_by_mask[mask] = [i for i in range(12) if mask >> i & 1]
+        definition = {}
+        if category_id >= 0:
+            definition["category"] = strings[category_id]
+        if alias_ids:
+            definition["aliases"] = [strings[alias] for alias in alias_ids]
+        definition["intervals"] = list(intervals)
+        definition["degree_labels"] = [strings[label] for label in label_ids]
+        definition["keys"] = keys_by_id[keys_id]
+        scales[strings[name_id]] = definition
+    return keys_by_id[default_keys_id], scales
+
+
+def snapshot_path(source: Path) -> Path:
+    """Where the compiled snapshot of a catalog file is cached (one per source path)."""
+    path_hash = hashlib.blake2b(str(Path(source).resolve()).encode("utf-8"), digest_size=8).hexdigest()
+    return SNAPSHOT_DIR / f"{Path(source).stem}-{path_hash}.snapshot"
+
+
+def source_digest(data: bytes, default_keys=None) -> bytes:
+    """Key of a snapshot: the catalog file's bytes, plus the fallback keys it was compiled with."""
+    digest = hashlib.blake2b(data, digest_size=16)
+    if default_keys is not None:
+        digest.update(json.dumps(default_keys).encode("utf-8"))
+    return digest.digest()
+
+
+def _read_snapshot(path: Path, digest: bytes):
+    # A snapshot is (format, source digest, compiled library); anything else is a cache miss.
+    try:
+        stored_format, stored_digest, snapshot = marshal.loads(path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if stored_format != SNAPSHOT_FORMAT or stored_digest != digest:
+        return None
+    return snapshot
+
+
+def _write_snapshot(path: Path, digest: bytes, snapshot):
+    # Written to a temporary file first, so a concurrent start never reads half a snapshot.
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        temporary.write_bytes(marshal.dumps((SNAPSHOT_FORMAT, digest, snapshot)))
+        os.replace(temporary, path)
+    except OSError:
+        # The cache is only an optimisation; a read-only home directory just means no snapshot.
+        pass
+
+
+def load_scale_library(source=SCALE_LIBRARY_PATH, default_keys=None):
+    """Load a scale catalog as (default_keys, scales), validating it only when it has changed.
+
+    The catalog file is hashed and compared with the digest stored in its cached snapshot; on
+    a match the snapshot is expanded without parsing or validating the JSON. Otherwise the file
+    is parsed and fully validated, and a new snapshot is written for the next start.
+    """
+    data = Path(source).read_bytes()
+    digest = source_digest(data, default_keys)
+    cache = snapshot_path(source)
+    snapshot = _read_snapshot(cache, digest)
+    if snapshot is not None:
+        try:
+            return expand_scale_library(snapshot)
+        except (IndexError, TypeError, ValueError):
+            # A damaged snapshot is only a cache miss; it is rebuilt from the source below.
+            pass
+
+    raw = json.loads(data.decode("utf-8"))
+    snapshot = compile_scale_library(*validate_scale_library(raw, source, default_keys))
+    _write_snapshot(cache, digest, snapshot)
+    return expand_scale_library(snapshot)
+
+
+def _comparable(definition):
+    return tuple(definition.get(field) or None for field in DEFINITION_FIELDS)
+
+
+class ScaleCatalog:
+    """The bundled scale library merged with the user's library files, updated file by file.
+
+    definitions maps every scale name to its validated definition, bundled scales first, then
+    the user files in file-name order; a user scale with the name of an earlier one replaces it.
+    reload() re-reads one user file and only validates the entries that differ from what was
+    loaded before, so editing one scale in a large library costs one entry of validation:
+
+        catalog = ScaleCatalog()
+        changed, removed = catalog.reload(USER_LIBRARY_DIR / "jazz.json")
+
+    A user file that fails to load keeps its previous scales, and the error is kept in errors.
+    """
+
+    def __init__(self, bundled=SCALE_LIBRARY_PATH, user_dir=USER_LIBRARY_DIR):
+        self.bundled = Path(bundled)
+        self.user_dir = Path(user_dir)
+        self.default_keys, bundled_scales = load_scale_library(self.bundled)
+        self.sources = {self.bundled: bundled_scales}
+        self.errors = {}
+        for path in self.user_files():
+            try:
+                self.sources[path] = load_scale_library(path, self.default_keys)[1]
+            except (OSError, ValueError, RuntimeError) as e:
+                self.errors[path] = str(e)
+
+        self.definitions = {}
+        for path in self._source_order():
+            self.definitions.update(self.sources[path])
+
+    def user_files(self):
+        """The user's library files, in the order they are merged."""
+        if not self.user_dir.is_dir():
+            return []
+        return sorted(self.user_dir.glob("*.json"))
+
+    def _source_order(self):
+        return [self.bundled] + sorted(path for path in self.sources if path != self.bundled)
+
+    def _definition_of(self, name):
+        # The last source that defines a name wins.
+        for path in reversed(self._source_order()):
+            definition = self.sources[path].get(name)
+            if definition is not None:
+                return definition
+        return None
+
+    def _read_user_file(self, path: Path, previous):
+        data = path.read_bytes()
+        # Same file-level rules as a full load at startup; only the entries are checked lazily.
+        default_keys, scales = check_scale_library(json.loads(data.decode("utf-8")), path, self.default_keys)
+
+        result = {}
+        for scale_name, entry in scales.items():
+            definition = dict(entry)
+            definition.setdefault("keys", default_keys)
+            old = previous.get(scale_name)
+            if old is not None and _comparable(old) == _comparable(definition):
+                # Unchanged, and so already valid: keep the loaded definition.
+                result[scale_name] = old
+                continue
+            validate_scale_definition(scale_name, definition, default_keys, path)
+            result[scale_name] = definition
+
+        cache_digest = source_digest(data, self.default_keys)
+        _write_snapshot(snapshot_path(path), cache_digest, compile_scale_library(default_keys, result))
+        return result
+
+    def reload(self, path):
+        """Apply the current contents of one user file (or its deletion) to the catalog.
+
+        Returns (changed, removed): {name: definition} of the scales that were added or now have
+        a different definition, and the names that no longer exist. Raises RuntimeError (after
+        recording it in errors) if the file is invalid; the catalog is then left unchanged.
+        """
+        path = Path(path)
+        previous = self.sources.get(path, {})
+        if path.exists():
+            try:
+                scales = self._read_user_file(path, previous)
+            except (OSError, ValueError, RuntimeError) as e:
+                self.errors[path] = str(e)
+                raise RuntimeError(str(e)) from e
+            self.sources[path] = scales
+        else:
+            scales = {}
+            self.sources.pop(path, None)
+        self.errors.pop(path, None)
+
+        changed, removed = {}, []
+        for scale_name in list(previous) + [name for name in scales if name not in previous]:
+            if previous.get(scale_name) is scales.get(scale_name):
+                continue
+            definition = self._definition_of(scale_name)
+            if definition is None:
+                if self.definitions.pop(scale_name, None) is not None:
+                    removed.append(scale_name)
+            elif self.definitions.get(scale_name) is not definition:
+                self.definitions[scale_name] = definition
+                changed[scale_name] = definition
+        return changed, removed
+
+
+if __name__ == "__main__":
+    # Compile ahead of time, e.g. after editing a large library:
+    #   python -m qt_ui.scale_library [library.json ...]
+    import sys
+
+    for library in sys.argv[1:] or [SCALE_LIBRARY_PATH]:
+        validated = validate_scale_library(json.loads(Path(library).read_text(encoding="utf-8")), library)
+        # Round trip: the snapshot must expand back to the validated catalog it was compiled from.
+        expanded = expand_scale_library(compile_scale_library(*validated))
+        if expanded[0] != validated[0] or {
+            name: _comparable(definition) for name, definition in expanded[1].items()
+        } != {name: _comparable(definition) for name, definition in validated[1].items()}:
+            sys.exit(f"{library}: the compiled snapshot does not match the library")
+        default_keys, scales = load_scale_library(library)
+        print(f"{library}: {len(scales)} scales -> {snapshot_path(library)}")
@@ -1,16 +1,20 @@
-import copy
-from pyaudio import PyAudio, paInt16
 from threading import Thread
 import numpy as np
 import sys
 
+from tuner_utils.audio_hub import get_audio_hub
+from tuner_utils.audio_source import to_float32
+from tuner_utils.pitch_detectors import PITCH_DETECTORS, HPSDetector
+from tuner_utils.settings import Settings
+from tuner_utils.spectrum_engine import AnalysisLevel, RegisterAdaptiveEngine, SlidingSpectrumEngine
+
 class AudioAnalyser(Thread):
-    """ This AudioAnalyzer reads the microphone and finds the frequency of the loudest tone.
-        To use it, you also need the ProtectedList class from the file threading_helper.py.
-        You need to create an instance of the ProtectedList, which acts as a queue, and you
+    """ This AudioAnalyzer reads the microphone (or any other AudioSource) and finds the frequency of the loudest tone.
+        To use it, you also need the RingBuffer class from the file threading_helper.py.
+        You need to create an instance of the RingBuffer, which acts as a queue, and you
         have to pass this queue to the AudioAnalyzer. Then you can read the values from the queue:
 
-        queue = ProtectedList()
+        queue = RingBuffer()
         analyzer = AudioAnalyzer(queue)
         analyzer.start()
 
@@ -22,54 +26,103 @@ class AudioAnalyser(Thread):
     # settings: (are tuned for best detecting string instruments like guitar)
     SAMPLING_RATE = 44100  # mac hardware: 44100, 48000, 96000. # Changed to 44100 to match note_trainer.py
     CHUNK_SIZE = 1024  # number of samples 
-    BUFFER_TIMES = 50  # buffer length = CHUNK_SIZE * BUFFER_TIMES
-    ZERO_PADDING = 3  # times the buffer length
+    BUFFER_TIMES = 16  # buffer length = CHUNK_SIZE * BUFFER_TIMES
+    ZERO_PADDING = 1  # times the buffer length
     NUM_HPS = 3  # Harmonic Product Spectrum
-
-    # overall frequency accuracy (step-size):  SAMPLING_RATE / (CHUNK_SIZE * BUFFER_TIMES * (1 + ZERO_PADDING)) Hz
-    #               buffer length in seconds:  (CHUNK_SIZE * BUFFER_TIMES) / SAMPLING_RATE sec
+    PEAK_INTERPOLATION = "gaussian"  # sub-bin refinement of the HPS peak: "gaussian", "parabolic" or None
+    PHASE_VOCODER = True  # refine the peak further with the phase advance between consecutive spectra
+    SPECTRUM_EVERY_N_CHUNKS = 2  # recompute the spectrum every N chunks (~46 ms at 44.1 kHz)...
+    SPECTRUM_CHANGE_THRESHOLD = 0.5  # ...or earlier if the chunk level changes by more than 50% (new pluck)
+
+    # register-adaptive analysis window: a coarse estimate on a short window picks one of these levels
+    ADAPTIVE_WINDOW = True
+    ADAPTIVE_LEVELS = (
+        # (from Hz, window samples, fft size, recompute every N chunks)
+        (0, CHUNK_SIZE * BUFFER_TIMES, CHUNK_SIZE * BUFFER_TIMES * (1 + ZERO_PADDING), SPECTRUM_EVERY_N_CHUNKS),
+        (130, 8192, 16384, 1),  # ~0.19 s window from C3 upwards
+        (230, 4096, 8192, 1),  # ~93 ms window from A#3 upwards (G/B/high E strings)
+    )
+    COARSE_WINDOW = (4096, 8192)  # window samples, fft size of the coarse estimate
+
+    # time-domain detectors ("yin", "mpm")
+    TIME_DOMAIN_WINDOW = 2048  # ~46 ms, long enough for two periods of 60 Hz
+
+    # bin spacing:  SAMPLING_RATE / (CHUNK_SIZE * BUFFER_TIMES * (1 + ZERO_PADDING)) Hz; with PEAK_INTERPOLATION
+    #               the estimate is accurate to a small fraction of a bin (see benchmarks/fft_size_benchmark.py)
+    # buffer length in seconds:  (CHUNK_SIZE * BUFFER_TIMES) / SAMPLING_RATE sec
 
     NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
 
-    def __init__(self, queue, device_index=None, *args, **kwargs):
+    def __init__(self, queue, device_index=None, spectrum_engine=None, source=None, on_estimate=None,
+                 detector=None, input_rms_threshold=None, *args, **kwargs):
         """
-        queue: instance of ProtectedList
+        queue: instance of RingBuffer
         device_index: PyAudio device index to use for input. If None, uses default input device.
+        spectrum_engine: instance of tuner_utils.spectrum_engine.SpectrumEngine for the "hps" detector.
+                         If None, a RegisterAdaptiveEngine (ADAPTIVE_WINDOW) or a SlidingSpectrumEngine
+                         is built from the class settings.
+        source: instance of tuner_utils.audio_source.AudioSource. If None, the analyser subscribes to
+                device_index on the shared AudioHub. The source is opened when the thread starts, so
+                an analyser that is only fed through process_chunk() never touches an audio device.
+        on_estimate: optional callable(frequency), called from the analyser thread right after a new
+                     estimate was put into the queue (use it to push updates instead of polling).
+        detector: name of the pitch detector backend ("hps", "yin" or "mpm", see
+                  tuner_utils.pitch_detectors) or a PitchDetector instance. If None,
+                  Settings.TUNER_PITCH_DETECTOR is used.
+        input_rms_threshold: only estimates from chunks at least this loud (RMS of the samples scaled
+                             to [-1, 1], as set in the input calibration) are reported. The "hps"
+                             detector finds a peak in every spectrum, so without it silence and
+                             background noise produce a steady stream of estimates. None reports all.
         """
         
         Thread.__init__(self, *args, **kwargs)
 
-        self.queue = queue  # queue should be instance of ProtectedList (threading_helper.ProtectedList)
-        self.buffer = np.zeros(self.CHUNK_SIZE * self.BUFFER_TIMES)
-        self.hanning_window = np.hanning(len(self.buffer))
+        self.queue = queue  # queue should be instance of RingBuffer (threading_helper.RingBuffer)
+        self.on_estimate = on_estimate
+        if source is None:
+            source = get_audio_hub().subscribe(device_index)
+        self.source = source
+        if detector is None or isinstance(detector, str):
+            detector = self.create_pitch_detector(detector or Settings.TUNER_PITCH_DETECTOR,
+                                                  self.source.sampling_rate, spectrum_engine)
+        self.detector = detector
+        self.input_rms_threshold = input_rms_threshold
         self.running = False
         self.device_index = device_index
-        
-        # Hardcode device here for now
-        self.device_index = device_index
 
-        try:
-            self.audio_object = PyAudio()
-            
-            # If no device index provided, use default input device
-            if self.device_index is None:
-                default_info = self.audio_object.get_default_input_device_info()
-                self.device_index = default_info["index"]
-                print(f"Using default input device: {default_info['name']} (index {self.device_index})")
-            else:
-                dev_info = self.audio_object.get_device_info_by_index(self.device_index)
-                print(f"Using selected input device: {dev_info['name']} (index {self.device_index})")
-                                 
-            self.stream = self.audio_object.open(format=paInt16,
-                                                 channels=1,
-                                                 rate=self.SAMPLING_RATE,
-                                                 input=True,
-                                                 output=False,
-                                                 frames_per_buffer=self.CHUNK_SIZE,
-                                                 input_device_index=self.device_index)
-        except Exception as e:
-            sys.stderr.write('Error: Line {} {} {}\n'.format(sys.exc_info()[-1].tb_lineno, type(e).__name__, e))
-            return
+    @classmethod
+    def create_spectrum_engine(cls, sampling_rate=None, adaptive=None):
+        """ builds the default spectrum engine from the class settings """
+
+        sampling_rate = sampling_rate or cls.SAMPLING_RATE
+        adaptive = cls.ADAPTIVE_WINDOW if adaptive is None else adaptive
+        if adaptive:
+            return RegisterAdaptiveEngine([AnalysisLevel(*level) for level in cls.ADAPTIVE_LEVELS],
+                                          sampling_rate, coarse=cls.COARSE_WINDOW, num_hps=cls.NUM_HPS,
+                                          change_threshold=cls.SPECTRUM_CHANGE_THRESHOLD)
+        return SlidingSpectrumEngine(cls.CHUNK_SIZE * cls.BUFFER_TIMES,
+                                     zero_padding=cls.ZERO_PADDING,
+                                     compute_every=cls.SPECTRUM_EVERY_N_CHUNKS,
+                                     change_threshold=cls.SPECTRUM_CHANGE_THRESHOLD)
+
+    @classmethod
+    def create_pitch_detector(cls, name, sampling_rate=None, spectrum_engine=None):
+        """ builds a pitch detector backend by name from the class settings """
+
+        sampling_rate = sampling_rate or cls.SAMPLING_RATE
+        if name not in PITCH_DETECTORS:
+            raise ValueError(f"Unknown pitch detector {name!r}, choose from {', '.join(PITCH_DETECTORS)}")
+        if name == HPSDetector.name:
+            return HPSDetector(spectrum_engine or cls.create_spectrum_engine(sampling_rate), sampling_rate,
+                               num_hps=cls.NUM_HPS, interpolation=cls.PEAK_INTERPOLATION,
+                               phase_vocoder=cls.PHASE_VOCODER)
+        return PITCH_DETECTORS[name](sampling_rate, window_size=cls.TIME_DOMAIN_WINDOW)
+
+    @property
+    def spectrum_engine(self):
+        """ the spectrum engine of the "hps" detector, None for the time-domain detectors """
+
+        return getattr(self.detector, "spectrum_engine", None)
 
     @staticmethod
     def frequency_to_number(freq, a4_freq):
@@ -101,67 +154,76 @@ class AudioAnalyser(Thread):
         note_name = AudioAnalyser.number_to_note_name(number)
         return note_name
 
+    def process_chunk(self, data):
+        """ feeds one chunk of samples through the pitch detector.
+            Returns the frequency of the loudest tone, or None if there is no new estimate """
+
+        return self.detector.process(data)
+
+    def is_loud_enough(self, data):
+        """ True if a chunk reaches input_rms_threshold (always True without a threshold) """
+
+        if not self.input_rms_threshold:
+            return True
+        signal = to_float32(data)
+        return float(np.sqrt(np.mean(np.square(signal)))) >= self.input_rms_threshold
+
     def run(self):
         """ Main function where the microphone buffer gets read and
             the fourier transformation gets applied """
 
         self.running = True
 
+        try:
+            self.source.open()
+        except Exception as e:
+            sys.stderr.write('Error: Line {} {} {}\n'.format(sys.exc_info()[-1].tb_lineno, type(e).__name__, e))
+            self.running = False
+            return
+
         while self.running:
             try:
                 # read microphone data
-                data = self.stream.read(self.CHUNK_SIZE, exception_on_overflow=False)
-                data = np.frombuffer(data, dtype=np.int16)
-
-                # append data to audio buffer
-                self.buffer[:-self.CHUNK_SIZE] = self.buffer[self.CHUNK_SIZE:]
-                self.buffer[-self.CHUNK_SIZE:] = data
-
-                # apply the fourier transformation on the whole buffer (with zero-padding + hanning window)
-                magnitude_data = abs(np.fft.fft(np.pad(self.buffer * self.hanning_window,
-                                                       (0, len(self.buffer) * self.ZERO_PADDING),
-                                                       "constant")))
-                # only use the first half of the fft output data
-                magnitude_data = magnitude_data[:int(len(magnitude_data) / 2)]
-
-                # HPS: multiply data by itself with different scalings (Harmonic Product Spectrum)
-                magnitude_data_orig = copy.deepcopy(magnitude_data)
-                for i in range(2, self.NUM_HPS+1, 1):
-                    hps_len = int(np.ceil(len(magnitude_data) / i))
-                    magnitude_data[:hps_len] *= magnitude_data_orig[::i]  # multiply every i element
-
-                # get the corresponding frequency array
-                frequencies = np.fft.fftfreq(int((len(magnitude_data) * 2) / 1),
-                                             1. / self.SAMPLING_RATE)
-
-                # set magnitude of all frequencies below 60Hz to zero
-                for i, freq in enumerate(frequencies):
-                    if freq > 60:
-                        magnitude_data[:i - 1] = 0
-                        break
+                data = self.source.read(self.CHUNK_SIZE)
+                if not len(data):
+                    # a finite source (file, array, pipe) has ended
+                    break
 
                 # put the frequency of the loudest tone into the queue
-                self.queue.put(round(frequencies[np.argmax(magnitude_data)], 2))
+                frequency = self.process_chunk(data)
+                if frequency is not None and self.is_loud_enough(data):
+                    self.queue.put(frequency)
+                    if self.on_estimate is not None:
+                        self.on_estimate(frequency)
 
             except Exception as e:
                 sys.stderr.write('Error: Line {} {} {}\n'.format(sys.exc_info()[-1].tb_lineno, type(e).__name__, e))
 
-        self.stream.stop_stream()
-        self.stream.close()
-        self.audio_object.terminate()
+        self.running = False
+        self.source.close()
 
 
 if __name__ == "__main__":
     # Only for testing:
-    from tuner_utils.threading_helper import ProtectedList
+    #   python -m tuner_utils.audio_analyser              default microphone
+    #   python -m tuner_utils.audio_analyser E2.wav       replay a WAV file in real time
+    #   python -m tuner_utils.audio_analyser -            raw int16 mono 44.1 kHz PCM from stdin
+    #   python -m tuner_utils.audio_analyser E2.wav yin   ...with another pitch detector (hps, yin, mpm)
+    from tuner_utils.audio_source import StdinSource, WavFileSource
+    from tuner_utils.threading_helper import RingBuffer
     import time
 
-    q = ProtectedList()
-    a = AudioAnalyser(q)
+    test_source = None
+    if len(sys.argv) > 1:
+        test_source = StdinSource() if sys.argv[1] == "-" else WavFileSource(sys.argv[1], realtime=True)
+    test_detector = sys.argv[2] if len(sys.argv) > 2 else None
+
+    q = RingBuffer()
+    a = AudioAnalyser(q, source=test_source, detector=test_detector)
     a.start()
 
-    while True:
+    while a.is_alive():
         q_data = q.get()
         if q_data is not None:
             print("loudest frequency:", q_data, "nearest note:", a.frequency_to_note_name(q_data, 440))
-            time.sleep(0.02)
+        time.sleep(0.02)
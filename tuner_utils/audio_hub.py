@@ -0,0 +1,238 @@
+from threading import Condition, Lock, Thread, Timer
+import sys
+
+import numpy as np
+
+from tuner_utils.audio_source import AudioSource, PyAudioSource, to_int16
+
+
+class DeviceCapture(Thread):
+    """ Owns the single input stream of one device and keeps the newest blocks in a shared ring.
+
+        The capture thread copies every block it reads into a preallocated (RING_BLOCKS x block_size)
+        float32 array and bumps a sequence number; subscribers read slots of that array directly. """
+
+    def __init__(self, source, block_size, ring_blocks):
+        Thread.__init__(self, daemon=True)
+        self.source = source
+        self.block_size = block_size
+        self.ring = np.zeros((ring_blocks, block_size), dtype=np.float32)
+        self.ring_blocks = ring_blocks
+        self.sequence = 0  # number of blocks written so far
+        self.condition = Condition()
+        self.running = False
+        self.subscribers = 0
+        self.close_timer = None  # pending idle close, see AudioHub.detach
+
+    def open(self):
+        """ opens the device in the caller's thread (so errors reach the first subscriber), then starts capturing """
+
+        self.source.open()
+        self.running = True
+        self.start()
+
+    def run(self):
+        try:
+            while self.running:
+                block = self.source.read(self.block_size)
+                if len(block) < self.block_size:
+                    break
+                with self.condition:
+                    self.ring[self.sequence % self.ring_blocks] = block
+                    self.sequence += 1
+                    self.condition.notify_all()
+        except Exception as e:
+            sys.stderr.write('Error: Line {} {} {}\n'.format(sys.exc_info()[-1].tb_lineno, type(e).__name__, e))
+        finally:
+            with self.condition:
+                self.running = False
+                self.condition.notify_all()
+            self.source.close()
+
+    def stop(self):
+        self.running = False
+        if self.is_alive():
+            self.join(1.0)
+
+
+class HubSubscription(AudioSource):
+    """ AudioSource reading from a shared DeviceCapture.
+
+        open()/close() only register/unregister with the hub; the device stays open. Reads of exactly
+        one block (hub.BLOCK_SIZE samples, float32) return read-only views into the shared ring
+        without copying; a view stays valid until the ring wraps around (RING_BLOCKS blocks later).
+        Other sizes or dtype=np.int16 return copies. A subscriber that falls more than a ring behind
+        skips ahead and counts the skipped blocks in dropped_blocks. """
+
+    WAIT_TIMEOUT = 0.5  # seconds between checks whether the capture has stopped
+
+    def __init__(self, hub, device_index=None, dtype=np.float32, preroll_blocks=0):
+        AudioSource.__init__(self, hub.SAMPLING_RATE, dtype)
+        self.hub = hub
+        self.device_index = device_index
+        self.preroll_blocks = preroll_blocks
+        self.capture = None
+        self.cursor = 0
+        self.dropped_blocks = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def open(self):
+        if self.is_open:
+            return
+        self.capture = self.hub.attach(self.device_index)
+        with self.capture.condition:
+            self.cursor = max(0, self.capture.sequence - min(self.preroll_blocks, self.capture.ring_blocks - 1))
+        self._pending = np.zeros(0, dtype=np.float32)
+        AudioSource.open(self)
+
+    def _next_block(self):
+        capture = self.capture
+        with capture.condition:
+            while self.cursor >= capture.sequence and capture.running and self.is_open:
+                capture.condition.wait(self.WAIT_TIMEOUT)
+            if self.cursor >= capture.sequence:
+                return None
+            behind = capture.sequence - self.cursor
+            if behind > capture.ring_blocks:
+                self.dropped_blocks += behind - capture.ring_blocks
+                self.cursor = capture.sequence - capture.ring_blocks
+            block = capture.ring[self.cursor % capture.ring_blocks]
+            self.cursor += 1
+        view = block.view()
+        view.flags.writeable = False
+        return view
+
+    def read(self, num_frames):
+        if num_frames == self.hub.BLOCK_SIZE and not len(self._pending):
+            block = self._next_block()
+            if block is None:
+                return np.zeros(0, dtype=self.dtype)
+            return block if self.dtype == np.float32 else to_int16(block)
+
+        parts = [self._pending]
+        available = len(self._pending)
+        while available < num_frames:
+            block = self._next_block()
+            if block is None:
+                break
+            parts.append(block)
+            available += len(block)
+        samples = np.concatenate(parts)
+        self._pending = samples[num_frames:].copy()
+        samples = samples[:num_frames]
+        return samples if self.dtype == np.float32 else to_int16(samples)
+
+    def discard_buffered(self):
+        if self.capture is not None:
+            with self.capture.condition:
+                self.cursor = self.capture.sequence
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def close(self):
+        if self.is_open:
+            AudioSource.close(self)
+            self.hub.detach(self.device_index)
+
+
+class AudioHub(object):
+    """ Long-lived capture service: one input stream per device, shared by every consumer.
+
+        The tuner, the calibration level meter and the note trainer subscribe instead of opening
+        their own PyAudio streams, so starting/stopping a consumer (or a trial) never reopens the
+        device. A device stays open for IDLE_CLOSE_SECONDS after its last subscriber leaves, so
+        back-to-back consumers share it, and is then closed (the OS no longer shows it in use):
+
+        hub = get_audio_hub()
+        source = hub.subscribe(device_index)   # an AudioSource
+        source.open()                          # first subscriber opens the device
+        block = source.read(hub.BLOCK_SIZE)    # zero-copy float32 view
+        source.close()                         # device keeps running for IDLE_CLOSE_SECONDS
+
+        source_factory(device_index) builds the underlying AudioSource for a device; it defaults to
+        a float32 PyAudioSource and can be replaced to run the hub on files or arrays. """
+
+    SAMPLING_RATE = 44100
+    BLOCK_SIZE = 1024
+    RING_BLOCKS = 64  # ~1.5 s of audio at 44.1 kHz
+    IDLE_CLOSE_SECONDS = 2.0  # grace period before a device without subscribers is closed
+
+    def __init__(self, source_factory=None):
+        self.source_factory = source_factory or self._default_source
+        self.captures = {}
+        self.lock = Lock()
+
+    def _default_source(self, device_index):
+        return PyAudioSource(device_index, self.SAMPLING_RATE, self.BLOCK_SIZE, dtype=np.float32)
+
+    def subscribe(self, device_index=None, dtype=np.float32, preroll_blocks=0):
+        """ returns an (unopened) AudioSource for device_index. preroll_blocks > 0 starts reading that
+            many already captured blocks in the past instead of at the next new block """
+
+        return HubSubscription(self, device_index, dtype, preroll_blocks)
+
+    def attach(self, device_index):
+        with self.lock:
+            capture = self.captures.get(device_index)
+            if capture is None or not capture.running:
+                capture = DeviceCapture(self.source_factory(device_index), self.BLOCK_SIZE, self.RING_BLOCKS)
+                capture.open()
+                self.captures[device_index] = capture
+            if capture.close_timer is not None:
+                capture.close_timer.cancel()
+                capture.close_timer = None
+            capture.subscribers += 1
+            return capture
+
+    def detach(self, device_index):
+        with self.lock:
+            capture = self.captures.get(device_index)
+            if capture is None:
+                return
+            capture.subscribers = max(0, capture.subscribers - 1)
+            if capture.subscribers == 0 and capture.close_timer is None:
+                capture.close_timer = Timer(self.IDLE_CLOSE_SECONDS, self._close_idle, (device_index, capture))
+                capture.close_timer.daemon = True
+                capture.close_timer.start()
+
+    def _close_idle(self, device_index, capture):
+        # timer thread: close the device unless a subscriber came back (or it was replaced) meanwhile
+        with self.lock:
+            if capture.subscribers or self.captures.get(device_index) is not capture:
+                return
+            del self.captures[device_index]
+            capture.close_timer = None
+        capture.stop()
+
+    def close_device(self, device_index):
+        with self.lock:
+            capture = self.captures.pop(device_index, None)
+            if capture is not None and capture.close_timer is not None:
+                capture.close_timer.cancel()
+        if capture is not None:
+            capture.stop()
+
+    def shutdown(self):
+        """ stops every capture thread and closes all devices """
+
+        with self.lock:
+            captures = list(self.captures.values())
+            self.captures = {}
+            for capture in captures:
+                if capture.close_timer is not None:
+                    capture.close_timer.cancel()
+        for capture in captures:
+            capture.stop()
+
+
+_audio_hub = None
+_audio_hub_lock = Lock()
+
+
+def get_audio_hub():
+    """ the process-wide AudioHub """
+
+    global _audio_hub
+    with _audio_hub_lock:
+        if _audio_hub is None:
+            _audio_hub = AudioHub()
+        return _audio_hub
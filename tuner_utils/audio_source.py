@@ -0,0 +1,256 @@
+import sys
+import time
+import wave
+
+import numpy as np
+
+
+def to_float32(samples):
+    """ converts int16 samples to float32 in [-1, 1]; float input is passed through as float32 """
+
+    samples = np.asarray(samples)
+    if samples.dtype == np.float32:
+        return samples
+    if samples.dtype.kind in "iu":
+        return (samples / 32768.0).astype(np.float32)
+    return samples.astype(np.float32)
+
+
+def to_int16(samples):
+    """ converts float samples in [-1, 1] to int16; integer input is passed through as int16 """
+
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        return samples
+    if samples.dtype.kind == "f":
+        return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    return samples.astype(np.int16)
+
+
+class AudioSource(object):
+    """ Mono audio input shared by the tuner, the note trainer and the calibration window.
+
+        A source delivers blocks of samples in `dtype` (np.int16 or np.float32 in [-1, 1]) at
+        `sampling_rate`. read() returns fewer samples than requested (eventually an empty array)
+        once a finite source is exhausted:
+
+        source = WavFileSource("E2.wav", dtype=np.float32)
+        with source:
+            while True:
+                block = source.read(1024)
+                if not len(block):
+                    break
+
+        open() is a no-op on an open source and close() keeps the read position of file and array
+        sources, so a consumer can close and reopen the same source without rewinding it.
+        With realtime=True, reads are paced to the sampling rate (useful to replay a file into the UI);
+        by default file, array and pipe sources are read as fast as the consumer asks. """
+
+    def __init__(self, sampling_rate=44100, dtype=np.int16, realtime=False):
+        self.sampling_rate = sampling_rate
+        self.dtype = np.dtype(dtype)
+        self.realtime = realtime
+        self.is_open = False
+        self._pace_start = None
+        self._pace_frames = 0
+
+    def open(self):
+        self.is_open = True
+        self._pace_start = None
+        self._pace_frames = 0
+
+    def read(self, num_frames):
+        raise NotImplementedError
+
+    def discard_buffered(self):
+        """ drops input that was captured but not read yet, so the next read() starts with fresh
+            audio. Only live sources buffer input; for files, arrays and pipes this is a no-op """
+
+    def close(self):
+        self.is_open = False
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _convert(self, samples):
+        return to_float32(samples) if self.dtype == np.float32 else to_int16(samples)
+
+    def _pace(self, num_frames):
+        # sleep until num_frames more samples would have arrived from a live device
+        if not self.realtime or not num_frames:
+            return
+        if self._pace_start is None:
+            self._pace_start = time.perf_counter()
+        self._pace_frames += num_frames
+        delay = self._pace_start + self._pace_frames / self.sampling_rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class PyAudioSource(AudioSource):
+    """ Live input from a PyAudio device. pyaudio is only imported when the stream is opened. """
+
+    def __init__(self, device_index=None, sampling_rate=44100, chunk_size=1024, dtype=np.int16):
+        AudioSource.__init__(self, sampling_rate, dtype)
+        self.device_index = device_index
+        self.chunk_size = chunk_size
+        self.audio_object = None
+        self.stream = None
+
+    def open(self):
+        if self.is_open:
+            return
+        import pyaudio
+
+        self.audio_object = pyaudio.PyAudio()
+        try:
+            # If no device index provided, use default input device
+            if self.device_index is None:
+                default_info = self.audio_object.get_default_input_device_info()
+                self.device_index = default_info["index"]
+                print(f"Using default input device: {default_info['name']} (index {self.device_index})")
+            else:
+                dev_info = self.audio_object.get_device_info_by_index(self.device_index)
+                print(f"Using selected input device: {dev_info['name']} (index {self.device_index})")
+
+            self.stream = self.audio_object.open(format=pyaudio.paFloat32 if self.dtype == np.float32 else pyaudio.paInt16,
+                                                 channels=1,
+                                                 rate=self.sampling_rate,
+                                                 input=True,
+                                                 output=False,
+                                                 frames_per_buffer=self.chunk_size,
+                                                 input_device_index=self.device_index)
+        except Exception:
+            self.audio_object.terminate()
+            self.audio_object = None
+            raise
+        AudioSource.open(self)
+
+    def read(self, num_frames):
+        data = self.stream.read(num_frames, exception_on_overflow=False)
+        return np.frombuffer(data, dtype=self.dtype)
+
+    def discard_buffered(self):
+        available = self.stream.get_read_available() if self.stream is not None else 0
+        if available:
+            self.stream.read(available, exception_on_overflow=False)
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        if self.audio_object is not None:
+            self.audio_object.terminate()
+            self.audio_object = None
+        AudioSource.close(self)
+
+
+class ArraySource(AudioSource):
+    """ Plays back an in-memory NumPy array (int16, or float in [-1, 1]). With loop=True it never ends. """
+
+    def __init__(self, samples, sampling_rate=44100, dtype=np.int16, realtime=False, loop=False):
+        AudioSource.__init__(self, sampling_rate, dtype, realtime)
+        self.samples = self._convert(np.asarray(samples).ravel())
+        self.loop = loop
+        self.position = 0
+
+    def rewind(self):
+        self.position = 0
+
+    def read(self, num_frames):
+        if self.loop and len(self.samples):
+            indices = np.arange(self.position, self.position + num_frames) % len(self.samples)
+            block = self.samples[indices]
+            self.position = (self.position + num_frames) % len(self.samples)
+        else:
+            block = self.samples[self.position:self.position + num_frames]
+            self.position += len(block)
+        self._pace(len(block))
+        return block
+
+
+class WavFileSource(ArraySource):
+    """ Reads a PCM WAV file (8/16/32-bit, mixed down to mono) at the file's own sampling rate.
+        Only the header is read up front; the samples are decoded when the source is first opened. """
+
+    def __init__(self, path, dtype=np.int16, realtime=False, loop=False):
+        with wave.open(str(path), "rb") as wav:
+            sampling_rate = wav.getframerate()
+        ArraySource.__init__(self, np.zeros(0, dtype=dtype), sampling_rate, dtype, realtime, loop)
+        self.path = path
+        self.loaded = False
+
+    def open(self):
+        if not self.loaded:
+            self.samples = self._load()
+            self.loaded = True
+        ArraySource.open(self)
+
+    def _load(self):
+        with wave.open(str(self.path), "rb") as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            raw = wav.readframes(wav.getnframes())
+
+        if width == 1:
+            samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128.0
+        elif width == 2:
+            samples = np.frombuffer(raw, dtype=np.int16)
+        elif width == 4:
+            samples = (np.frombuffer(raw, dtype=np.int32) / 2147483648.0).astype(np.float32)
+        else:
+            raise ValueError(f"Unsupported sample width ({width} bytes) in {self.path}")
+
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype(samples.dtype)
+        return self._convert(samples)
+
+
+class RawFileSource(AudioSource):
+    """ Headerless PCM from a file path or a binary file object (pipes included).
+        sample_format is the format of the stored data ('int16' or 'float32'). """
+
+    def __init__(self, file, sampling_rate=44100, sample_format="int16", dtype=np.int16, realtime=False):
+        AudioSource.__init__(self, sampling_rate, dtype, realtime)
+        self.file = file
+        self.sample_format = np.dtype(sample_format)
+        self.handle = None
+        self.offset = 0  # bytes consumed from a file path, so a reopened source continues where it stopped
+
+    def open(self):
+        if self.is_open:
+            return
+        if isinstance(self.file, (str, bytes)) or hasattr(self.file, "__fspath__"):
+            self.handle = open(self.file, "rb")
+            self.handle.seek(self.offset)
+        else:
+            self.handle = self.file
+        AudioSource.open(self)
+
+    def read(self, num_frames):
+        item_size = self.sample_format.itemsize
+        data = self.handle.read(num_frames * item_size)
+        data = data[:len(data) - len(data) % item_size]
+        self.offset += len(data)
+        block = self._convert(np.frombuffer(data, dtype=self.sample_format))
+        self._pace(len(block))
+        return block
+
+    def close(self):
+        # only close handles this source opened itself; a caller-provided stream stays usable
+        if self.handle is not None and self.handle is not self.file:
+            self.handle.close()
+        self.handle = None
+        AudioSource.close(self)
+
+
+class StdinSource(RawFileSource):
+    """ Raw PCM piped into the process, e.g.  arecord -f S16_LE -r 44100 -c 1 | python -m tuner_utils.audio_analyser - """
+
+    def __init__(self, sampling_rate=44100, sample_format="int16", dtype=np.int16, realtime=False):
+        RawFileSource.__init__(self, sys.stdin.buffer, sampling_rate, sample_format, dtype, realtime)
@@ -0,0 +1,92 @@
+import numpy as np
+
+from tuner_utils.peak_interpolation import INTERPOLATIONS, phase_vocoder_frequency
+
+
+class HPSPipeline(object):
+    """ Precomputed Harmonic Product Spectrum stage of the AudioAnalyser.
+
+        Everything that only depends on the transform size lives here as persistent arrays: the
+        frequency axis, the index below which bins are muted (MIN_FREQUENCY) and the HPS scratch
+        buffer. process() then runs in place with NumPy and does not allocate any array data:
+
+        hps = HPSPipeline(engine.num_bins, engine.fft_size, 44100)
+        loudest_frequency = hps.process(engine.magnitude)
+
+        Without interpolation the result is the centre frequency of the HPS peak bin, so the
+        accuracy is limited to the bin spacing (sampling_rate / fft_size). With
+        interpolation="parabolic" or "gaussian" the peak is refined on the magnitude spectrum to a
+        fraction of a bin, using the strongest of the first num_hps harmonics (the error of
+        harmonic h shrinks by 1/h). Given the complex spectrum of this and of the previous frame
+        (hop samples earlier), process() also applies phase-vocoder refinement to that peak. """
+
+    MIN_FREQUENCY = 60  # magnitudes of all frequencies below this (in Hz) are set to zero
+
+    def __init__(self, num_bins, fft_size, sampling_rate, num_hps=3, min_frequency=None, interpolation=None):
+        self.num_bins = int(num_bins)
+        self.fft_size = int(fft_size)
+        self.sampling_rate = sampling_rate
+        self.num_hps = int(num_hps)
+        self.min_frequency = self.MIN_FREQUENCY if min_frequency is None else min_frequency
+
+        # same axis (and rounding) as np.fft.fftfreq, positive half only
+        self.frequencies = np.fft.fftfreq(self.fft_size, 1. / self.sampling_rate)[:self.num_bins].copy()
+
+        # the original loop zeroed everything up to one bin before the first bin above the cutoff
+        first_above = int(np.argmax(self.frequencies > self.min_frequency))
+        self.cutoff_index = max(0, first_above - 1)
+
+        # (length of the product, decimation step) for every harmonic
+        self.hps_steps = [(int(np.ceil(self.num_bins / i)), i) for i in range(2, self.num_hps + 1)]
+        self.hps = np.zeros(self.num_bins)
+
+        if interpolation is not None and interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown interpolation {interpolation!r}, choose from {', '.join(INTERPOLATIONS)}")
+        self.interpolation = interpolation
+        self.bin_width = self.sampling_rate / self.fft_size
+        self.peak_index = 0
+
+    def process(self, magnitude, spectrum=None, previous_spectrum=None, hop=0):
+        """ returns the frequency (rounded to 0.01 Hz) of the HPS peak of a magnitude spectrum.
+            magnitude is left untouched, the product is built in self.hps.
+            spectrum / previous_spectrum: complex spectra of this and of the previous frame, hop
+            samples apart, for the phase-vocoder refinement (only used with interpolation) """
+
+        hps = self.hps
+        np.copyto(hps, magnitude)
+
+        # HPS: multiply data by itself with different scalings
+        for hps_len, step in self.hps_steps:
+            hps[:hps_len] *= magnitude[::step]  # multiply every i element
+
+        hps[:self.cutoff_index] = 0
+        self.peak_index = int(np.argmax(hps))
+        if self.interpolation is None:
+            return round(float(self.frequencies[self.peak_index]), 2)
+        return round(self.refine(magnitude, spectrum, previous_spectrum, hop), 2)
+
+    def refine(self, magnitude, spectrum=None, previous_spectrum=None, hop=0):
+        """ sub-bin estimate of the fundamental at self.peak_index """
+
+        # strongest harmonic of the peak, located as the local maximum next to its expected bin
+        best_index, best_harmonic = self.peak_index, 1
+        for harmonic in range(1, self.num_hps + 1):
+            centre = self.peak_index * harmonic
+            low, high = max(1, centre - harmonic), min(self.num_bins - 1, centre + harmonic + 1)
+            if low >= high:
+                break
+            index = low + int(np.argmax(magnitude[low:high]))
+            if magnitude[index] > magnitude[best_index]:
+                best_index, best_harmonic = index, harmonic
+
+        if not 0 < best_index < self.num_bins - 1:
+            return float(self.frequencies[self.peak_index])
+        frequency = (best_index + INTERPOLATIONS[self.interpolation](magnitude, best_index)) * self.bin_width
+
+        if spectrum is not None and previous_spectrum is not None and hop > 0:
+            refined = phase_vocoder_frequency(frequency, np.angle(spectrum[best_index]),
+                                              np.angle(previous_spectrum[best_index]), hop, self.sampling_rate)
+            # anything further off than half a bin is a note change between the frames, not a refinement
+            if abs(refined - frequency) <= 0.5 * self.bin_width:
+                frequency = refined
+        return frequency / best_harmonic
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def parabolic_offset(values, index):
+    """ offset (in bins, within +-0.5 for a local maximum) of the vertex of the parabola through
+        values[index - 1], values[index] and values[index + 1] """
+
+    left, centre, right = float(values[index - 1]), float(values[index]), float(values[index + 1])
+    denominator = left - 2 * centre + right
+    if denominator == 0:
+        return 0.0
+    return 0.5 * (left - right) / denominator
+
+
+def gaussian_offset(values, index):
+    """ parabolic interpolation on the logarithm of the values, i.e. fitting a Gaussian. For the
+        main lobe of a Hann-windowed sinusoid this is several times more accurate than a plain
+        parabola on the magnitudes """
+
+    left, centre, right = values[index - 1], values[index], values[index + 1]
+    if left <= 0 or centre <= 0 or right <= 0:
+        return parabolic_offset(values, index)
+    return parabolic_offset(np.log([left, centre, right]), 1)
+
+
+INTERPOLATIONS = {
+    "parabolic": parabolic_offset,
+    "gaussian": gaussian_offset,
+}
+
+
+def phase_vocoder_frequency(frequency, phase, previous_phase, hop, sampling_rate):
+    """ refines a frequency estimate with the phase advance of its bin between two spectra taken
+        hop samples apart: the deviation from the advance expected for `frequency` is wrapped to
+        [-pi, pi) and converted back to Hz. Unambiguous while the estimate is within
+        sampling_rate / (2 * hop) Hz of the true frequency """
+
+    expected = 2 * np.pi * frequency * hop / sampling_rate
+    deviation = (phase - previous_phase - expected + np.pi) % (2 * np.pi) - np.pi
+    return frequency + deviation * sampling_rate / (2 * np.pi * hop)
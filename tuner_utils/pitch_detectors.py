@@ -0,0 +1,278 @@
+import numpy as np
+
+from tuner_utils.hps_pipeline import HPSPipeline
+from tuner_utils.peak_interpolation import parabolic_offset
+
+
+class PitchDetector(object):
+    """ Base class for the pitch stage of the AudioAnalyser.
+
+        A detector is fed consecutive chunks of samples with process(), which returns the
+        estimated fundamental frequency in Hz, or None when no new estimate is available
+        (not recomputed for this chunk, or no clear pitch in the signal):
+
+        detector = YinDetector(44100)
+        frequency = detector.process(chunk)
+
+        Backends (numbers for 44.1 kHz, 1024-sample chunks, measured with benchmarks/pitch_benchmark):
+
+        hps   FFT + Harmonic Product Spectrum over 93-370 ms windows (see the
+              RegisterAdaptiveEngine) with sub-bin peak interpolation. ~0.1 cent on clean tones,
+              1-2 chunks to report a new note (a few more to flush a held low note), 0.2-0.4 ms
+              per chunk; also reports a (noise) peak during silence.
+        yin   YIN on a 2048-sample window (46 ms). ~1 cent on clean tones, settles within two
+              chunks in every register, ~0.15 ms per chunk, reports nothing for noise.
+        mpm   McLeod Pitch Method on the same window. Same cost as yin and usually one chunk
+              faster to report a new note, since it picks a peak instead of waiting for a dip. """
+
+    name = None
+
+    def __init__(self, sampling_rate):
+        self.sampling_rate = sampling_rate
+
+    def process(self, chunk):
+        """ appends a chunk of samples, returns the new frequency estimate or None """
+
+        raise NotImplementedError
+
+    def reset(self):
+        """ forgets the sample history """
+
+        raise NotImplementedError
+
+
+class HPSDetector(PitchDetector):
+    """ The FFT + Harmonic Product Spectrum detector: a SpectrumEngine followed by an HPSPipeline
+        matching the engine's current transform length (one pipeline is cached per length, so
+        register-adaptive engines can switch between them).
+
+        interpolation ("parabolic", "gaussian" or None) refines the peak to a fraction of a bin;
+        with phase_vocoder=True the phase advance between consecutive spectra refines it further
+        (needs an engine with SpectrumViews, i.e. a SlidingSpectrumEngine). """
+
+    name = "hps"
+
+    def __init__(self, spectrum_engine, sampling_rate, num_hps=3, interpolation=None, phase_vocoder=False):
+        PitchDetector.__init__(self, sampling_rate)
+        self.spectrum_engine = spectrum_engine
+        self.num_hps = num_hps
+        self.interpolation = interpolation
+        self.phase_vocoder = phase_vocoder and interpolation is not None
+        self.hps_pipelines = {}
+
+    def hps_pipeline(self):
+        """ the HPS pipeline matching the engine's current transform length """
+
+        engine = self.spectrum_engine
+        pipeline = self.hps_pipelines.get(engine.fft_size)
+        if pipeline is None:
+            pipeline = HPSPipeline(engine.num_bins, engine.fft_size, self.sampling_rate, num_hps=self.num_hps,
+                                   interpolation=self.interpolation)
+            self.hps_pipelines[engine.fft_size] = pipeline
+        return pipeline
+
+    def process(self, chunk):
+        # the spectrum (zero-padding + hanning window, first half of the fft output only) is only
+        # recomputed when the engine says so
+        if not self.spectrum_engine.push(chunk):
+            return None
+
+        # HPS with frequencies below 60Hz muted
+        view = getattr(self.spectrum_engine, "current_view", None)
+        if self.phase_vocoder and view is not None and 0 < view.hop <= view.window_size:
+            return self.hps_pipeline().process(view.magnitude, view.spectrum, view.previous_spectrum, view.hop)
+        return self.hps_pipeline().process(self.spectrum_engine.magnitude)
+
+    def reset(self):
+        self.spectrum_engine.reset()
+
+
+class TimeDomainDetector(PitchDetector):
+    """ Shared part of the autocorrelation-style detectors: a short sliding window of the newest
+        `window_size` samples and preallocated FFT buffers to correlate it with itself.
+
+        Lags from sampling_rate / max_frequency to sampling_rate / min_frequency are searched; the
+        window must be longer than the largest lag. The estimate is refreshed every `compute_every`
+        chunks. """
+
+    MIN_FREQUENCY = 60
+    MAX_FREQUENCY = 1400  # fundamental of the 24th fret on the high E string is ~1319 Hz
+
+    def __init__(self, sampling_rate, window_size=2048, min_frequency=None, max_frequency=None, compute_every=1):
+        PitchDetector.__init__(self, sampling_rate)
+        self.window_size = int(window_size)
+        self.min_frequency = self.MIN_FREQUENCY if min_frequency is None else min_frequency
+        self.max_frequency = self.MAX_FREQUENCY if max_frequency is None else max_frequency
+        self.compute_every = max(1, int(compute_every))
+
+        self.tau_min = max(2, int(sampling_rate / self.max_frequency))
+        self.tau_max = int(np.ceil(sampling_rate / self.min_frequency))
+        if self.tau_max >= self.window_size:
+            raise ValueError(f"window_size {self.window_size} is too short for {self.min_frequency} Hz")
+
+        self.window = np.zeros(self.window_size)
+        self.fft_size = 1 << int(np.ceil(np.log2(2 * self.window_size)))  # no circular wrap-around
+        self.padded = np.zeros(self.fft_size)
+        self.spectrum = np.zeros(self.fft_size // 2 + 1, dtype=np.complex128)
+        self.correlation = np.zeros(self.fft_size)
+        self.chunks_since_compute = 0
+
+    def _write(self, chunk):
+        chunk_size = len(chunk)
+        if chunk_size >= self.window_size:
+            self.window[:] = chunk[-self.window_size:]
+        else:
+            self.window[:-chunk_size] = self.window[chunk_size:]
+            self.window[-chunk_size:] = chunk
+
+    def process(self, chunk):
+        self._write(chunk)
+        self.chunks_since_compute += 1
+        if self.chunks_since_compute < self.compute_every:
+            return None
+        self.chunks_since_compute = 0
+        return self.estimate()
+
+    def estimate(self):
+        """ returns the frequency of the current window or None """
+
+        raise NotImplementedError
+
+    def reset(self):
+        self.window[:] = 0
+        self.chunks_since_compute = 0
+
+
+class YinDetector(TimeDomainDetector):
+    """ YIN (de Cheveigné & Kawahara, 2002) with the difference function computed through an FFT.
+
+        The window is split into an integration part of window_size - tau_max samples and the
+        lags; the cumulative mean normalized difference is searched for the first dip below
+        `threshold`, then refined with parabolic interpolation. Returns None if no lag is periodic
+        enough, which also keeps silence and noise out of the queue. """
+
+    name = "yin"
+    THRESHOLD = 0.15
+
+    def __init__(self, sampling_rate, window_size=2048, min_frequency=None, max_frequency=None, compute_every=1,
+                 threshold=None):
+        TimeDomainDetector.__init__(self, sampling_rate, window_size, min_frequency, max_frequency, compute_every)
+        self.threshold = self.THRESHOLD if threshold is None else threshold
+        self.integration_size = self.window_size - self.tau_max
+        self.spectrum_head = np.zeros_like(self.spectrum)
+        self.energy = np.zeros(self.window_size + 1)
+        self.difference = np.zeros(self.tau_max + 1)
+        self.normalized = np.ones(self.tau_max + 1)
+        self.lags = np.arange(1, self.tau_max + 1)
+
+    def estimate(self):
+        n = self.integration_size
+        tau_max = self.tau_max
+
+        # r(tau) = sum_{j < n} x[j] * x[j + tau] as the cross-correlation of the first n samples with the window
+        self.padded[:self.window_size] = self.window
+        np.fft.rfft(self.padded, out=self.spectrum)
+        self.padded[n:self.window_size] = 0
+        np.fft.rfft(self.padded, out=self.spectrum_head)
+        np.conjugate(self.spectrum_head, out=self.spectrum_head)
+        self.spectrum_head *= self.spectrum
+        np.fft.irfft(self.spectrum_head, n=self.fft_size, out=self.correlation)
+
+        # d(tau) = e(0) + e(tau) - 2 r(tau), with e(tau) the energy of window[tau:tau + n]
+        np.cumsum(np.square(self.window), out=self.energy[1:])
+        energy = self.energy
+        difference = self.difference
+        np.subtract(energy[n:n + tau_max + 1], energy[:tau_max + 1], out=difference)
+        difference += energy[n]
+        difference -= 2 * self.correlation[:tau_max + 1]
+        difference[0] = 0
+
+        # cumulative mean normalized difference d'(tau) = d(tau) * tau / sum_{1..tau} d
+        normalized = self.normalized
+        np.cumsum(difference[1:], out=normalized[1:])
+        np.maximum(normalized[1:], 1e-12, out=normalized[1:])
+        np.divide(difference[1:] * self.lags, normalized[1:], out=normalized[1:])
+        normalized[0] = 1
+
+        candidates = np.flatnonzero(normalized[self.tau_min:tau_max] < self.threshold)
+        if not len(candidates):
+            return None
+        tau = self.tau_min + int(candidates[0])
+        while tau + 1 < tau_max and normalized[tau + 1] < normalized[tau]:
+            tau += 1
+        tau += parabolic_offset(normalized, tau)
+        return round(self.sampling_rate / tau, 2)
+
+
+class MPMDetector(TimeDomainDetector):
+    """ McLeod Pitch Method (McLeod & Wyvill, 2005) with the autocorrelation computed through an FFT.
+
+        The normalized square difference function (NSDF) is split at its positive-going zero
+        crossings; the first key maximum reaching `cutoff` times the highest one is the period,
+        refined with parabolic interpolation. Returns None if the NSDF peak is below `min_clarity`. """
+
+    name = "mpm"
+    CUTOFF = 0.93
+    MIN_CLARITY = 0.5
+
+    def __init__(self, sampling_rate, window_size=2048, min_frequency=None, max_frequency=None, compute_every=1,
+                 cutoff=None, min_clarity=None):
+        TimeDomainDetector.__init__(self, sampling_rate, window_size, min_frequency, max_frequency, compute_every)
+        self.cutoff = self.CUTOFF if cutoff is None else cutoff
+        self.min_clarity = self.MIN_CLARITY if min_clarity is None else min_clarity
+        self.energy = np.zeros(self.window_size + 1)
+        self.nsdf = np.zeros(self.tau_max + 2)
+        self.norm = np.zeros(self.tau_max + 2)
+
+    def estimate(self):
+        w = self.window_size
+        size = self.tau_max + 2  # one lag beyond tau_max for the interpolation
+
+        # r(tau) = sum_{j < w - tau} x[j] * x[j + tau]
+        self.padded[:w] = self.window
+        np.fft.rfft(self.padded, out=self.spectrum)
+        np.multiply(self.spectrum, np.conjugate(self.spectrum), out=self.spectrum)
+        np.fft.irfft(self.spectrum, n=self.fft_size, out=self.correlation)
+
+        # m(tau) = sum_{j < w - tau} x[j]^2 + x[j + tau]^2
+        np.cumsum(np.square(self.window), out=self.energy[1:])
+        energy = self.energy
+        norm = self.norm
+        np.add(energy[w:w - size:-1], energy[w], out=norm)
+        norm -= energy[:size]
+        np.maximum(norm, 1e-12, out=norm)
+
+        nsdf = self.nsdf
+        np.divide(self.correlation[:size], norm, out=nsdf)
+        nsdf *= 2
+
+        # key maxima: the highest value between each positive-going zero crossing and the next
+        # negative-going one, searched from the first negative-going crossing on
+        signs = nsdf[:size - 1] > 0
+        crossings = np.flatnonzero(signs[1:] != signs[:-1]) + 1
+        if len(crossings) < 2:
+            return None
+        rising = crossings[~signs[crossings - 1]]
+        rising = rising[rising >= self.tau_min - 1]
+        if not len(rising):
+            return None
+        ends = np.searchsorted(crossings, rising, side="right")
+        ends = np.where(ends < len(crossings), crossings[np.minimum(ends, len(crossings) - 1)], size - 1)
+        peak_values = np.maximum.reduceat(nsdf, np.stack([rising, ends], axis=1).ravel())[::2]
+        highest = float(peak_values.max())
+        if highest < self.min_clarity:
+            return None
+
+        key = int(np.argmax(peak_values >= self.cutoff * highest))
+        tau = int(rising[key]) + int(np.argmax(nsdf[rising[key]:ends[key]]))
+        if tau < 1 or tau >= size - 1:
+            return None
+        tau += parabolic_offset(nsdf, tau)
+        return round(self.sampling_rate / tau, 2)
+
+
+PITCH_DETECTORS = {
+    HPSDetector.name: HPSDetector,
+    YinDetector.name: YinDetector,
+    MPMDetector.name: MPMDetector,
+}
@@ -31,7 +31,13 @@ class Settings:
     FPS = 60  # canvas update rate
     CANVAS_SIZE = 300  # size of the audio-display
 
+    TUNER_PITCH_DETECTOR = "hps"  # "hps" (most accurate), "yin" or "mpm" (short window, low latency/CPU)
+
     NEEDLE_BUFFER_LENGTH = 30
     HITS_TILL_NOTE_NUMBER_UPDATE = 15
+
+    # live note capture in the custom scale window: "yin" reports nothing between notes instead of
+    # noise, and a note counts as played after this many identical estimates in a row
+    SCALE_FINDER_PITCH_DETECTOR = "yin"
+    SCALE_FINDER_NOTE_HITS = 4
     
-    GUI_UPDATE_INTERVAL_MS = 10 # Used for how often to read frequency queue and update GUI
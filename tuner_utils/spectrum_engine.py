@@ -0,0 +1,307 @@
+import numpy as np
+
+from tuner_utils.hps_pipeline import HPSPipeline
+
+
+class SpectrumEngine(object):
+    """ Base class for the spectrum stage of the AudioAnalyser.
+
+        An engine keeps the most recent `buffer_size` samples and exposes the magnitude of the
+        positive-frequency half of the (windowed, zero-padded) spectrum in `self.magnitude`.
+        Audio is fed in with push(), which returns True whenever `self.magnitude` was recomputed:
+
+        engine = SlidingSpectrumEngine(16384, zero_padding=1, compute_every=2)
+        if engine.push(chunk):
+            loudest_bin = np.argmax(engine.magnitude) """
+
+    def __init__(self, buffer_size, zero_padding=0):
+        self.buffer_size = int(buffer_size)
+        self.zero_padding = int(zero_padding)
+        self.fft_size = self.buffer_size * (1 + self.zero_padding)
+        self.num_bins = self.fft_size // 2
+        self.magnitude = np.zeros(self.num_bins)
+
+    def push(self, chunk):
+        """ appends a chunk of samples, returns True if self.magnitude was recomputed """
+
+        raise NotImplementedError
+
+    def reset(self):
+        """ clears the sample history and the last spectrum """
+
+        raise NotImplementedError
+
+
+class ReferenceSpectrumEngine(SpectrumEngine):
+    """ The original analyser pipeline: shift the whole buffer, window it, zero-pad it and run a
+        full complex FFT for every chunk. Kept as a baseline for comparisons and benchmarks. """
+
+    def __init__(self, buffer_size, zero_padding=0):
+        SpectrumEngine.__init__(self, buffer_size, zero_padding)
+        self.buffer = np.zeros(self.buffer_size)
+        self.hanning_window = np.hanning(self.buffer_size)
+
+    def push(self, chunk):
+        chunk_size = len(chunk)
+        self.buffer[:-chunk_size] = self.buffer[chunk_size:]
+        self.buffer[-chunk_size:] = chunk
+
+        magnitude_data = abs(np.fft.fft(np.pad(self.buffer * self.hanning_window,
+                                               (0, len(self.buffer) * self.zero_padding),
+                                               "constant")))
+        self.magnitude = magnitude_data[:int(len(magnitude_data) / 2)]
+        return True
+
+    def reset(self):
+        self.buffer[:] = 0
+        self.magnitude = np.zeros(self.num_bins)
+
+
+class SpectrumView(object):
+    """ Preallocated buffers to transform the newest `window_size` samples of a ring buffer:
+        a Hann window, a work array zero-padded to `fft_size`, the rfft output and the magnitudes
+        of the first fft_size // 2 bins. One view exists per (window_size, fft_size) pair.
+
+        The rfft output of the computation before is kept in previous_spectrum, and hop is the
+        number of samples written between the two (0 before the second computation), for
+        phase-vocoder refinement. """
+
+    def __init__(self, window_size, fft_size):
+        self.window_size = int(window_size)
+        self.fft_size = int(fft_size)
+        self.num_bins = self.fft_size // 2
+        self.hanning_window = np.hanning(self.window_size)
+        self.work = np.zeros(self.fft_size)  # tail stays zero and acts as the zero padding
+        self.spectrum = np.zeros(self.fft_size // 2 + 1, dtype=np.complex128)
+        self.previous_spectrum = np.zeros_like(self.spectrum)
+        self.magnitude = np.zeros(self.num_bins)
+        self.computed_at = None  # engine.samples_written at the last computation
+        self.hop = 0
+
+    def reset(self):
+        self.magnitude[:] = 0
+        self.computed_at = None
+        self.hop = 0
+
+
+class SlidingSpectrumEngine(SpectrumEngine):
+    """ Incremental spectrum engine built around a preallocated ring buffer.
+
+        Incoming chunks overwrite the oldest samples in place instead of shifting the whole buffer.
+        The window is applied while unrolling the ring into a zero-padded work array that is
+        allocated once, and the real-input transform (rfft) writes into a preallocated output.
+        The transform length never changes, so numpy's FFT plan cache stays warm between calls.
+
+        The spectrum is only recomputed every `compute_every` chunks, or earlier when the level of
+        the newest chunk differs from the level at the last computation by more than
+        `change_threshold` (relative RMS change, e.g. 0.5 = 50%). With change_threshold=None only
+        the chunk count is used. For compute_every=1 the output is identical to the reference
+        engine.
+
+        Spectra of shorter windows of the newest samples are available through view() and
+        compute_view(); their buffers are cached per size as well. """
+
+    def __init__(self, buffer_size, zero_padding=0, compute_every=1, change_threshold=None):
+        SpectrumEngine.__init__(self, buffer_size, zero_padding)
+        self.compute_every = max(1, int(compute_every))
+        self.change_threshold = change_threshold
+
+        self.ring = np.zeros(self.buffer_size)
+        self.write_pos = 0  # index of the oldest sample == next write position
+        self.samples_written = 0
+        self.views = {}
+        self.full_view = self.view(self.buffer_size, self.fft_size)
+        self.current_view = self.full_view  # the view self.magnitude belongs to
+        self.magnitude = self.full_view.magnitude
+
+        self.chunks_since_compute = 0
+        self.last_rms = None
+        self.computations = 0
+
+    def view(self, window_size, fft_size):
+        """ returns the (cached) SpectrumView for a window of the newest window_size samples """
+
+        key = (int(window_size), int(fft_size))
+        if key not in self.views:
+            if key[0] > self.buffer_size or key[1] < key[0]:
+                raise ValueError(f"Invalid spectrum view {key} for a buffer of {self.buffer_size} samples")
+            self.views[key] = SpectrumView(*key)
+        return self.views[key]
+
+    def _write(self, chunk):
+        # copy the chunk into the ring, wrapping around the end if needed; returns the chunk energy
+        chunk_size = len(chunk)
+        self.samples_written += chunk_size
+        if chunk_size >= self.buffer_size:
+            self.ring[:] = chunk[-self.buffer_size:]
+            self.write_pos = 0
+            return float(np.dot(self.ring, self.ring)), self.buffer_size
+
+        start = self.write_pos
+        first = min(chunk_size, self.buffer_size - start)
+        self.ring[start:start + first] = chunk[:first]
+        energy = float(np.dot(self.ring[start:start + first], self.ring[start:start + first]))
+        if first < chunk_size:
+            rest = chunk_size - first
+            self.ring[:rest] = chunk[first:]
+            energy += float(np.dot(self.ring[:rest], self.ring[:rest]))
+        self.write_pos = (start + chunk_size) % self.buffer_size
+        return energy, chunk_size
+
+    def _signal_changed(self, rms):
+        if self.change_threshold is None or self.last_rms is None:
+            return False
+        return abs(rms - self.last_rms) > self.change_threshold * max(self.last_rms, 1e-12)
+
+    def push(self, chunk):
+        energy, count = self._write(chunk)
+        rms = np.sqrt(energy / count) if count else 0.0
+        self.chunks_since_compute += 1
+
+        if self.chunks_since_compute < self.compute_every and not self._signal_changed(rms):
+            return False
+
+        self.compute()
+        self.chunks_since_compute = 0
+        self.last_rms = rms
+        return True
+
+    def compute(self):
+        """ recomputes self.magnitude from the current ring buffer contents """
+
+        self.compute_view(self.full_view)
+
+    def compute_view(self, view):
+        """ transforms the newest view.window_size samples into view.magnitude """
+
+        # unroll the newest samples (oldest first) into the work array, applying the window on the way
+        window_size = view.window_size
+        start = (self.write_pos - window_size) % self.buffer_size
+        head = min(window_size, self.buffer_size - start)
+        np.multiply(self.ring[start:start + head], view.hanning_window[:head], out=view.work[:head])
+        if head < window_size:
+            np.multiply(self.ring[:window_size - head], view.hanning_window[head:], out=view.work[head:window_size])
+
+        view.spectrum, view.previous_spectrum = view.previous_spectrum, view.spectrum
+        np.fft.rfft(view.work, out=view.spectrum)
+        np.abs(view.spectrum[:view.num_bins], out=view.magnitude)
+        view.hop = 0 if view.computed_at is None else self.samples_written - view.computed_at
+        view.computed_at = self.samples_written
+        self.computations += 1
+        return view.magnitude
+
+    def reset(self):
+        self.ring[:] = 0
+        self.write_pos = 0
+        self.samples_written = 0
+        for view in self.views.values():
+            view.reset()
+        self.chunks_since_compute = 0
+        self.last_rms = None
+
+
+class AnalysisLevel(object):
+    """ One register of the RegisterAdaptiveEngine: used for pitches from min_frequency upwards. """
+
+    def __init__(self, min_frequency, window_size, fft_size, compute_every=1):
+        self.min_frequency = min_frequency
+        self.window_size = int(window_size)
+        self.fft_size = int(fft_size)
+        self.compute_every = max(1, int(compute_every))
+
+    def __repr__(self):
+        return "AnalysisLevel({}, {}, {}, {})".format(self.min_frequency, self.window_size,
+                                                     self.fft_size, self.compute_every)
+
+
+class RegisterAdaptiveEngine(SlidingSpectrumEngine):
+    """ Multi-resolution spectrum engine that sizes the analysis window to the register being played.
+
+        Low notes need a long window to resolve their closely spaced harmonics, high notes do not,
+        and a long window also keeps the previous note in the buffer for a long time. For every
+        chunk the engine runs a cheap HPS estimate on a short `coarse` window and picks the level
+        whose min_frequency range contains that estimate (with `hysteresis` to avoid flapping at
+        the boundaries). That level's spectrum is computed into self.magnitude on the level's own
+        hop (compute_every), or right away when the level changed, so high registers get both a
+        shorter window and more frequent updates. self.fft_size / self.num_bins follow the
+        selected level. """
+
+    HYSTERESIS = 0.05  # relative margin around a level boundary before switching
+
+    def __init__(self, levels, sampling_rate, coarse=(4096, 16384), num_hps=3, change_threshold=None,
+                 hysteresis=None):
+        self.levels = sorted(levels, key=lambda level: level.min_frequency)
+        buffer_size = max(level.window_size for level in self.levels)
+        SlidingSpectrumEngine.__init__(self, buffer_size, 0, self.levels[0].compute_every, change_threshold)
+        self.hysteresis = self.HYSTERESIS if hysteresis is None else hysteresis
+
+        self.coarse_view = self.view(*coarse)
+        self.coarse_hps = HPSPipeline(self.coarse_view.num_bins, self.coarse_view.fft_size,
+                                      sampling_rate, num_hps=num_hps)
+        self.level_views = [self.view(level.window_size, level.fft_size) for level in self.levels]
+        self.coarse_frequency = None
+        self.level_index = -1
+        self._select(0)
+
+    @property
+    def level(self):
+        return self.levels[self.level_index]
+
+    def _select(self, index):
+        if index == self.level_index:
+            return
+        self.level_index = index
+        view = self.level_views[index]
+        self.current_view = view
+        self.magnitude = view.magnitude
+        self.fft_size = view.fft_size
+        self.num_bins = view.num_bins
+        self.compute_every = self.levels[index].compute_every
+
+    def select_level(self, frequency):
+        """ returns the level index for a (coarse) frequency, staying on the current level near its edges """
+
+        target = 0
+        for index, level in enumerate(self.levels):
+            if frequency >= level.min_frequency:
+                target = index
+
+        # inside the hysteresis band of the edge that was crossed last, stop one level short of the
+        # target: a jump across several levels still moves as far as the clearly crossed edges allow
+        current = self.level_index
+        if target > current and frequency < self.levels[target].min_frequency * (1 + self.hysteresis):
+            target -= 1
+        elif target < current and frequency >= self.levels[target + 1].min_frequency * (1 - self.hysteresis):
+            target += 1
+        return target
+
+    def push(self, chunk):
+        energy, count = self._write(chunk)
+        rms = np.sqrt(energy / count) if count else 0.0
+        self.chunks_since_compute += 1
+
+        # the coarse estimate runs on every chunk, so a new register is picked up (and computed) immediately
+        self.compute_view(self.coarse_view)
+        self.coarse_frequency = self.coarse_hps.process(self.coarse_view.magnitude)
+        level_index = self.select_level(self.coarse_frequency)
+        level_changed = level_index != self.level_index
+        self._select(level_index)
+
+        if (self.chunks_since_compute < self.compute_every and not level_changed
+                and not self._signal_changed(rms)):
+            return False
+
+        self.compute()
+        self.chunks_since_compute = 0
+        self.last_rms = rms
+        return True
+
+    def compute(self):
+        view = self.level_views[self.level_index]
+        if view is not self.coarse_view:  # otherwise it was computed for this chunk already
+            self.compute_view(view)
+
+    def reset(self):
+        SlidingSpectrumEngine.reset(self)
+        self.coarse_frequency = None
+        self._select(0)
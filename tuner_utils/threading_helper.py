@@ -1,49 +1,94 @@
-from threading import Lock
+import numpy as np
 
 
-class ProtectedList(object):
-    """ Simple FIFO queue to share data between Threads with lock protection.
-        Standard buffer length is only 8! """
+class RingBuffer(object):
+    """ Fixed-capacity FIFO to pass values from one producer thread to one consumer thread.
 
-    def __init__(self, buffer_size=8):
-        self.elements = []
-        self.buffer_size = buffer_size
-        self.lock = Lock()
+        Values live in a preallocated NumPy array. There is no lock: only the producer writes
+        write_index and only the consumer writes read_index, and every index update is a single
+        attribute store. When the producer gets a full ring ahead it overwrites the oldest unread values:
 
-    def put(self, element):
-        
-        # Lock structure so no other thread can read or write simultaneously.
-        self.lock.acquire()
+        overflow_count  puts that landed on a full buffer (counted by the producer)
+        drop_count      values the consumer never received: overwritten before they were read, or
+                        skipped by latest() (counted by the consumer)
+
+        queue = RingBuffer(capacity=64)
+        queue.put(440.0)        # producer
+        queue.latest()          # consumer: newest value in O(1), older unread values are skipped
+        queue.get_all()         # consumer: every unread value, oldest first """
 
-        # append new element at the end of the list
-        self.elements.append(element)
+    def __init__(self, capacity=8, dtype=np.float64):
+        self.capacity = int(capacity)
+        self.data = np.zeros(self.capacity, dtype=dtype)
+        self.write_index = 0  # total number of values put
+        self.read_index = 0  # total number of values consumed (or skipped)
+        self.overflow_count = 0
+        self.drop_count = 0
+
+    def put(self, element):
+        write_index = self.write_index
+        if write_index - self.read_index >= self.capacity:
+            self.overflow_count += 1
+        self.data[write_index % self.capacity] = element
+        # publish only after the value is in place
+        self.write_index = write_index + 1
 
-        # delete oldest element if list is too long
-        if len(self.elements) > self.buffer_size:
-            self.elements.pop(0)
+    def _unread_start(self, write_index):
+        # first readable index; values older than one ring behind the producer are gone
+        return max(self.read_index, write_index - self.capacity)
 
-        # Release the lock.
-        self.lock.release()
+    def _advance(self, start, read_index):
+        # commit a successful read that began at start: the unread values before it were
+        # overwritten, counted once here rather than on every retry
+        self.drop_count += start - self.read_index
+        self.read_index = read_index
 
     def get(self):
-        self.lock.acquire()
+        """ returns the oldest unread value, or None if nothing is unread """
 
-        # check if something is in the list. If so, returns oldest element and deletes from start of list.
-        if len(self.elements) > 0:
-            element = self.elements[0]
-            del self.elements[0]
+        while True:
+            write_index = self.write_index
+            read_index = self._unread_start(write_index)
+            if read_index >= write_index:
+                self._advance(read_index, read_index)
+                return None
+            element = self.data[read_index % self.capacity].item()
+            # the producer may have wrapped onto this slot while it was read; retry from the new oldest value
+            if self.write_index - read_index <= self.capacity:
+                self._advance(read_index, read_index + 1)
+                return element
 
-        # if list is empty return None
-        else:
-            element = None
+    def get_all(self):
+        """ returns all unread values (oldest first) as a new array and marks them as read """
 
-        self.lock.release()
-        return element
+        while True:
+            write_index = self.write_index
+            read_index = self._unread_start(write_index)
+            indices = np.arange(read_index, write_index) % self.capacity
+            elements = self.data[indices]
+            if self.write_index - read_index <= self.capacity:
+                self._advance(read_index, write_index)
+                return elements
 
-    def __repr__(self):
-        self.lock.acquire()
+    def latest(self):
+        """ returns the newest value and marks everything up to it as read, or None if nothing is unread """
+
+        while True:
+            write_index = self.write_index
+            read_index = self.read_index
+            if read_index >= write_index:
+                return None
+            element = self.data[(write_index - 1) % self.capacity].item()
+            # the producer may have wrapped onto this slot while it was read; retry with the new newest value
+            if self.write_index - (write_index - 1) <= self.capacity:
+                self.drop_count += write_index - 1 - read_index
+                self.read_index = write_index
+                return element
 
-        string = str(self.elements)
+    def __len__(self):
+        return min(self.write_index - self.read_index, self.capacity)
 
-        self.lock.release()
-        return string
+    def __repr__(self):
+        write_index = self.write_index
+        read_index = max(self.read_index, write_index - self.capacity)
+        return str([self.data[i % self.capacity].item() for i in range(read_index, write_index)])